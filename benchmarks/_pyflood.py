@@ -0,0 +1,26 @@
+"""Make the bundled pyflood package importable by the benchmarks.
+
+The integration folder can not be added to the path, as its select module
+would shadow the standard library one.
+"""
+import importlib.util
+import os
+import sys
+
+PYFLOOD_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "custom_components",
+    "flood",
+    "pyflood",
+)
+
+if "pyflood" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "pyflood",
+        os.path.join(PYFLOOD_PATH, "__init__.py"),
+        submodule_search_locations=[PYFLOOD_PATH],
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules["pyflood"] = _module
+    _spec.loader.exec_module(_module)
@@ -0,0 +1,73 @@
+"""Benchmark connection reuse of FloodApi against the Flood stub.
+
+Run refresh cycles (FloodApi.global_get) with a connection opened per
+request, as when keep-alive is lost, then with the pool of create_session.
+
+    python benchmarks/bench_connection.py [--cycles 200] [--latency 0.005]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+import _pyflood  # noqa: F401
+from mock_flood import MockFlood
+from pyflood import FloodApi, create_session
+
+
+def percentile(values: list, percent: float) -> float:
+    """Return a percentile of the values."""
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+async def run_cycles(port: int, session: aiohttp.ClientSession, cycles: int) -> list:
+    """Run refresh cycles and return their durations in seconds."""
+    durations = []
+    async with session:
+        api = FloodApi("127.0.0.1", port, "flood", "flood", session=session)
+        await api.auth()
+        for _ in range(cycles):
+            start = time.perf_counter()
+            await api.global_get()
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmark."""
+    variants = {
+        "unpooled": lambda: aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(force_close=True),
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+        ),
+        "pooled": create_session,
+    }
+    print(
+        f"{'variant':>9} {'requests':>9} {'conns':>6}"
+        f" {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}"
+    )
+    for name, session_factory in variants.items():
+        mock = MockFlood(torrents=args.torrents, latency=args.latency)
+        port = await mock.start()
+        try:
+            durations = await run_cycles(port, session_factory(), args.cycles)
+        finally:
+            await mock.stop()
+        print(
+            f"{name:>9} {mock.requests:>9} {len(mock.connections):>6}"
+            f" {percentile(durations, 50) * 1000:>8.2f}"
+            f" {percentile(durations, 99) * 1000:>8.2f}"
+            f" {statistics.mean(durations) * 1000:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=200)
+    parser.add_argument("--torrents", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0)
+    asyncio.run(main(parser.parse_args()))
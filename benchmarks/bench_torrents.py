@@ -0,0 +1,112 @@
+"""Benchmark the aggregation of Flood torrents.
+
+Compare the former aggregation, filtering the raw torrent list once per
+status, with the torrent store: counters only, as polled by default, with
+group counters, and with records, as kept for the activity stream and the
+torrent sensors.
+
+    python benchmarks/bench_torrents.py [--sizes 1000 10000 50000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import _pyflood  # noqa: F401
+from mock_flood import synthetic_torrents
+from pyflood.torrents import TorrentStore
+
+
+def baseline(torrents: dict) -> dict:
+    """Aggregate the way FloodApi.torrents did before the torrent store."""
+    torrents = torrents.values()
+    completed = list(filter(lambda d: "complete" in d["status"], torrents))
+    seeding = list(filter(lambda d: "seeding" in d["status"], torrents))
+    downloading = list(filter(lambda d: "downloading" in d["status"], torrents))
+    active = list(filter(lambda d: "active" in d["status"], torrents))
+    inactive = list(filter(lambda d: "inactive" in d["status"], torrents))
+    stopped = list(filter(lambda d: "stopped" in d["status"], torrents))
+    return {
+        "count": len(torrents),
+        "completed": len(completed),
+        "downloading": len(downloading),
+        "seeding": len(seeding),
+        "stopped": len(stopped),
+        "inactive": len(inactive),
+        "active": len(active),
+    }
+
+
+def store(records: bool, groups: bool):
+    """Return an aggregation with the torrent store."""
+
+    def aggregate(torrents: dict) -> tuple:
+        """Aggregate with the torrent store."""
+        torrent_store = TorrentStore()
+        torrent_store.replace(torrents, records, groups)
+        return torrent_store.summary(), torrent_store
+
+    return aggregate
+
+
+VARIANTS = {
+    "counters": store(records=False, groups=False),
+    "groups": store(records=False, groups=True),
+    "records": store(records=True, groups=True),
+}
+
+
+def measure(function, torrents: dict, rounds: int) -> dict:
+    """Return the CPU time and peak memory of an aggregation."""
+    gc.collect()
+    start = time.process_time()
+    for _ in range(rounds):
+        function(torrents)
+    cpu = (time.process_time() - start) / rounds
+
+    gc.collect()
+    tracemalloc.start()
+    result = function(torrents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_ms": cpu * 1000, "peak_kib": peak / 1024, "result": result}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'torrents':>9} {'variant':>9} {'cpu ms':>9}"
+        f" {'peak KiB':>10} {'kept KiB':>10}"
+    )
+    for size in args.sizes:
+        torrents = synthetic_torrents(size)
+
+        before = measure(baseline, torrents, args.rounds)
+        # The former aggregation kept nothing between refreshes
+        rows = [("before", before, 0)]
+        for name, aggregate in VARIANTS.items():
+            after = measure(aggregate, torrents, args.rounds)
+            assert before["result"] == after["result"][0]
+            # Memory the store keeps between refreshes
+            gc.collect()
+            tracemalloc.start()
+            kept_store = aggregate(torrents)
+            kept, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del kept_store
+            rows.append((name, after, kept))
+
+        for name, result, kept in rows:
+            print(
+                f"{size:>9} {name:>9} {result['cpu_ms']:>9.2f}"
+                f" {result['peak_kib']:>10.0f} {kept / 1024:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Stub of the Flood API endpoints used by pyflood.
+
+Torrent and notification counts, latency and jitter are configurable. The
+activity stream sends full updates, then a number of torrent diffs.
+
+    python benchmarks/mock_flood.py --torrents 10000 --latency 0.02
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+from aiohttp import web
+
+STATUS_SETS = [
+    ["complete", "seeding", "active"],
+    ["complete", "seeding", "inactive"],
+    ["downloading", "active"],
+    ["downloading", "inactive"],
+    ["complete", "stopped", "inactive"],
+    ["stopped", "inactive"],
+]
+TAGS = [[], ["movies"], ["series"], ["linux", "iso"], ["music"]]
+TRACKERS = [["tracker.example.org"], ["open.example.net"], ["private.example.com"]]
+
+
+def synthetic_torrents(count: int, seed: int = 0) -> dict:
+    """Return a torrent list shaped like the Flood API response."""
+    rand = random.Random(seed)
+    torrents = {}
+    for index in range(count):
+        torrent_hash = f"{index:040X}"
+        size = rand.randint(1 << 20, 1 << 34)
+        torrents[torrent_hash] = {
+            "hash": torrent_hash,
+            "name": f"Synthetic torrent {index}",
+            "status": list(rand.choice(STATUS_SETS)),
+            "tags": list(rand.choice(TAGS)),
+            "trackerURIs": list(rand.choice(TRACKERS)),
+            "downRate": rand.randint(0, 1 << 20),
+            "upRate": rand.randint(0, 1 << 20),
+            "downTotal": rand.randint(0, size),
+            "upTotal": rand.randint(0, size * 3),
+            "sizeBytes": size,
+            "bytesDone": rand.randint(0, size),
+            "percentComplete": rand.random() * 100,
+            "ratio": rand.random() * 3,
+            "eta": rand.randint(-1, 100000),
+            "peersConnected": rand.randint(0, 50),
+            "peersTotal": rand.randint(0, 500),
+            "seedsConnected": rand.randint(0, 50),
+            "seedsTotal": rand.randint(0, 500),
+            "priority": 1,
+            "directory": f"/downloads/{index}",
+            "message": "",
+            "comment": "",
+            "dateAdded": 1600000000 + index,
+            "dateCreated": 1500000000 + index,
+            "isPrivate": False,
+            "isInitialSeeding": False,
+            "isSequential": False,
+        }
+    return torrents
+
+
+def synthetic_notifications(count: int, seed: int = 0) -> list:
+    """Return notifications shaped like the Flood API response, newest first."""
+    rand = random.Random(seed)
+    notifications = []
+    for index in range(count, 0, -1):
+        notification_id = rand.choice(
+            [
+                "notification.torrent.finished",
+                "notification.torrent.errored",
+                "notification.feed.torrent.added",
+            ]
+        )
+        notifications.append(
+            {
+                "_id": f"{index:016x}",
+                "id": notification_id,
+                "read": False,
+                "ts": 1600000000000 + index * 1000,
+                "data": {"name": f"Synthetic torrent {index}", "feedLabel": "Feed"},
+            }
+        )
+    return notifications
+
+
+class MockFlood:
+    """Flood API stub serving synthetic data."""
+
+    def __init__(
+        self,
+        torrents: int = 1000,
+        notifications: int = 100,
+        latency: float = 0,
+        jitter: float = 0,
+        seed: int = 0,
+        stream_diffs: int = 100,
+    ) -> None:
+        """Init the stub with its data size and response delay in seconds."""
+        self.latency = latency
+        self.jitter = jitter
+        self.stream_diffs = stream_diffs
+        self.torrents = synthetic_torrents(torrents, seed)
+        self.notifications = synthetic_notifications(notifications, seed)
+        self.client_settings = {
+            "throttleGlobalDownSpeed": 0,
+            "throttleGlobalUpSpeed": 0,
+        }
+        self.connections = set()
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._runner = None
+        self._torrents_body = None
+
+    def app(self) -> web.Application:
+        """Return the web application of the stub."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/api/auth/authenticate", self._authenticate)
+        app.router.add_get("/api/client/connection-test", self._connection_test)
+        app.router.add_get("/api/client/settings", self._get_client_settings)
+        app.router.add_patch("/api/client/settings", self._set_client_settings)
+        app.router.add_get("/api/settings", self._settings)
+        app.router.add_get("/api/notifications", self._get_notifications)
+        app.router.add_get("/api/history", self._history)
+        app.router.add_get("/api/torrents", self._get_torrents)
+        app.router.add_post("/api/torrents/start", self._control)
+        app.router.add_post("/api/torrents/stop", self._control)
+        app.router.add_post("/api/torrents/check-hash", self._control)
+        app.router.add_get("/api/activity-stream", self._activity_stream)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving and return the port listened to."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        """Count requests and connections, and delay responses."""
+        self.requests += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await handler(request)
+
+    @staticmethod
+    def _json(request: web.Request, body: bytes) -> web.Response:
+        """Return a JSON response with an ETag, as Flood does."""
+        etag = 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            body=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    async def _authenticate(self, request: web.Request) -> web.Response:
+        """Accept any credentials."""
+        response = web.json_response({"success": True, "username": "flood"})
+        response.set_cookie("jwt", "mock")
+        return response
+
+    async def _connection_test(self, request: web.Request) -> web.Response:
+        """Return the torrent client connection status."""
+        return self._json(request, b'{"isConnected":true}')
+
+    async def _get_client_settings(self, request: web.Request) -> web.Response:
+        """Return the torrent client settings."""
+        return self._json(request, json.dumps(self.client_settings).encode())
+
+    async def _set_client_settings(self, request: web.Request) -> web.Response:
+        """Update the torrent client settings."""
+        self.client_settings.update(await request.json())
+        return web.json_response({})
+
+    async def _settings(self, request: web.Request) -> web.Response:
+        """Return the Flood settings."""
+        limits = [0, 1024, 10240, 102400, 1048576]
+        body = {"speedLimits": {"download": limits, "upload": limits}}
+        return self._json(request, json.dumps(body).encode())
+
+    async def _get_notifications(self, request: web.Request) -> web.Response:
+        """Return a page of notifications."""
+        start = int(request.query.get("start", 0))
+        limit = request.query.get("limit")
+        end = start + int(limit) if limit is not None else None
+        body = {
+            "notifications": self.notifications[start:end],
+            "count": {"total": len(self.notifications), "unread": 0, "read": 0},
+        }
+        return self._json(request, json.dumps(body).encode())
+
+    async def _history(self, request: web.Request) -> web.Response:
+        """Return a FIVE_MINUTE transfer history."""
+        points = 60
+        body = {
+            "timestamps": [1600000000000 + i * 5000 for i in range(points)],
+            "download": [self._random.randint(0, 1 << 24) for _ in range(points)],
+            "upload": [self._random.randint(0, 1 << 22) for _ in range(points)],
+        }
+        return self._json(request, json.dumps(body).encode())
+
+    async def _get_torrents(self, request: web.Request) -> web.Response:
+        """Return the torrent list."""
+        if self._torrents_body is None:
+            self._torrents_body = json.dumps(
+                {"id": 1, "torrents": self.torrents}
+            ).encode()
+        return self._json(request, self._torrents_body)
+
+    async def _control(self, request: web.Request) -> web.Response:
+        """Accept a torrent control command."""
+        await request.json()
+        return web.json_response({})
+
+    async def _activity_stream(self, request: web.Request) -> web.StreamResponse:
+        """Send full updates, then diffs of the transfer rate of torrents."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        async def send(event: str, payload) -> None:
+            data = json.dumps(payload)
+            await response.write(f"event: {event}\ndata: {data}\n\n".encode())
+
+        await send("CLIENT_CONNECTIVITY_STATUS_CHANGE", {"isConnected": True})
+        # Events carry bare payloads, unlike the API responses
+        await send(
+            "TRANSFER_SUMMARY_FULL_UPDATE",
+            {"downRate": 0, "upRate": 0, "downTotal": 0, "upTotal": 0},
+        )
+        await send("TORRENT_LIST_FULL_UPDATE", self.torrents)
+        hashes = list(self.torrents)
+        for _ in range(self.stream_diffs):
+            torrent_hash = self._random.choice(hashes)
+            await send(
+                "TORRENT_LIST_DIFF_CHANGE",
+                [
+                    {
+                        "op": "replace",
+                        "path": f"/{torrent_hash}/downRate",
+                        "value": self._random.randint(0, 1 << 20),
+                    }
+                ],
+            )
+        return response
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Serve the stub until interrupted."""
+    mock = MockFlood(
+        args.torrents,
+        args.notifications,
+        args.latency,
+        args.jitter,
+        stream_diffs=args.stream_diffs,
+    )
+    port = await mock.start(args.host, args.port)
+    print(f"Mock Flood listening on http://{args.host}:{port}/api/")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--torrents", type=int, default=1000)
+    parser.add_argument("--notifications", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--stream-diffs", type=int, default=100)
+    asyncio.run(_serve(parser.parse_args()))
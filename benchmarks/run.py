@@ -0,0 +1,249 @@
+"""Run the benchmark suite of pyflood and the integration against the Flood stub.
+
+Each scenario runs in a fresh process while the stub serves from this one,
+and reports throughput, p50/p99 latency, traced allocations and peak RSS.
+Results are saved as JSON, and compared to a baseline when one is given: the
+run fails if a scenario got slower or allocates more than the tolerance.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --baseline results.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from mock_flood import MockFlood
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Iterations traced for allocations, tracing slows everything down
+ALLOCATION_ITERATIONS = 20
+# Metrics compared to the baseline, higher is worse
+GUARDED_METRICS = ("p50_ms", "alloc_peak_kib")
+
+
+def percentile(values: list, percent: float) -> float:
+    """Return a percentile of the values."""
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+async def bench_global_get(port: int, iterations: int) -> list:
+    """Refresh every category, as the coordinator does at startup."""
+    from pyflood import FloodApi
+
+    durations = []
+    async with FloodApi("127.0.0.1", port, "flood", "flood") as api:
+        await api.auth()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await api.global_get()
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def bench_stop_all(port: int, iterations: int) -> list:
+    """Stop all torrents, from a torrent store already filled."""
+    from pyflood import FloodApi
+
+    durations = []
+    async with FloodApi(
+        "127.0.0.1", port, "flood", "flood", torrent_records=True
+    ) as api:
+        await api.auth()
+        await api.torrents()
+        hashes = [record.hash for record in api.torrent_store.select()]
+        for _ in range(iterations):
+            # Torrents stopped by the previous iteration are started again,
+            # else they would be skipped
+            api.torrent_store.set_stopped(hashes, False)
+            start = time.perf_counter()
+            await api.stop_all()
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def bench_coordinator(port: int, iterations: int) -> list:
+    """Run coordinator updates requesting every category."""
+    sys.path.insert(0, ROOT)
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.flood.const import TIER_FAST, TIER_MEDIUM, TIER_SLOW
+    from custom_components.flood.coordinator import FloodDataUpdateCoordinator
+    from custom_components.flood.pyflood import FloodApi
+
+    durations = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        async with FloodApi("127.0.0.1", port, "flood", "flood") as api:
+            await api.auth()
+            coordinator = FloodDataUpdateCoordinator(
+                hass, api, {TIER_FAST: 15, TIER_MEDIUM: 60, TIER_SLOW: 600}
+            )
+            for _ in range(iterations):
+                coordinator._requested.update(api.categories)
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                durations.append(time.perf_counter() - start)
+                if not coordinator.last_update_success:
+                    raise RuntimeError("Coordinator update failed")
+        await hass.async_stop(force=True)
+    return durations
+
+
+async def bench_stream(port: int, iterations: int) -> list:
+    """Apply torrent diffs of the activity stream, timing the gap between them."""
+    from pyflood import FloodActivityStream, FloodApi
+
+    times = []
+    done = asyncio.Event()
+
+    def on_update(data: dict) -> None:
+        if "torrents" in data:
+            times.append(time.perf_counter())
+            # The full update is followed by one update per diff
+            if len(times) > iterations:
+                done.set()
+
+    async with FloodApi("127.0.0.1", port, "flood", "flood") as api:
+        await api.auth()
+        stream = FloodActivityStream(api, on_update)
+        stream.start()
+        try:
+            await asyncio.wait_for(done.wait(), 60)
+        finally:
+            stream.stop()
+    times = times[: iterations + 1]
+    return [end - start for start, end in zip(times, times[1:])]
+
+
+SCENARIOS = {
+    "global_get": bench_global_get,
+    "stop_all": bench_stop_all,
+    "coordinator": bench_coordinator,
+    "stream": bench_stream,
+}
+
+
+def run_scenario(name: str, port: int, iterations: int) -> dict:
+    """Run a scenario in this process and return its measures."""
+    import _pyflood  # noqa: F401
+
+    scenario = SCENARIOS[name]
+    start = time.perf_counter()
+    durations = asyncio.run(scenario(port, iterations))
+    elapsed = time.perf_counter() - start
+    rss_peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    asyncio.run(scenario(port, min(iterations, ALLOCATION_ITERATIONS)))
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": len(durations),
+        "throughput": len(durations) / elapsed,
+        "p50_ms": percentile(durations, 50) * 1000,
+        "p99_ms": percentile(durations, 99) * 1000,
+        "mean_ms": statistics.mean(durations) * 1000,
+        "alloc_peak_kib": alloc_peak / 1024,
+        "rss_peak_kib": rss_peak_kib,
+    }
+
+
+async def main(args: argparse.Namespace) -> dict:
+    """Run the scenarios and return the results."""
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "torrents": args.torrents,
+            "notifications": args.notifications,
+            "latency": args.latency,
+            "jitter": args.jitter,
+        },
+        "scenarios": {},
+    }
+    loop = asyncio.get_running_loop()
+    context = multiprocessing.get_context("spawn")
+    for name in args.scenarios:
+        mock = MockFlood(
+            args.torrents,
+            args.notifications,
+            args.latency,
+            args.jitter,
+            stream_diffs=args.iterations,
+        )
+        port = await mock.start()
+        try:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = await loop.run_in_executor(
+                    executor, run_scenario, name, port, args.iterations
+                )
+        except ImportError as err:
+            print(f"{name:>12} skipped: {err}")
+            continue
+        finally:
+            await mock.stop()
+        result["requests"] = mock.requests
+        results["scenarios"][name] = result
+        print(
+            f"{name:>12} {result['throughput']:>9.1f}/s"
+            f" p50 {result['p50_ms']:>8.2f} ms p99 {result['p99_ms']:>8.2f} ms"
+            f" alloc {result['alloc_peak_kib']:>9.0f} KiB"
+            f" rss {result['rss_peak_kib']:>8} KiB"
+        )
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the metrics worse than the baseline by more than the tolerance."""
+    found = []
+    for name, result in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for metric in GUARDED_METRICS:
+            if result[metric] > reference[metric] * (1 + tolerance):
+                found.append(
+                    f"{name} {metric}: {result[metric]:.2f}"
+                    f" > {reference[metric]:.2f} (+{tolerance:.0%})"
+                )
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--torrents", type=int, default=1000)
+    parser.add_argument("--notifications", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--output", help="file to save the results to")
+    parser.add_argument("--baseline", help="results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    arguments = parser.parse_args()
+
+    run_results = asyncio.run(main(arguments))
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(run_results, file, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline, encoding="utf-8") as file:
+            worse = regressions(run_results, json.load(file), arguments.tolerance)
+        for regression in worse:
+            print(f"Regression: {regression}")
+        sys.exit(1 if worse else 0)
@@ -1,9 +1,8 @@
 """Flood integration."""
 import asyncio
-from datetime import timedelta
 import logging
 
-from aiohttp import CookieJar
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -12,29 +11,120 @@ from homeassistant.const import (
     CONF_PORT,
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
+    EVENT_HOMEASSISTANT_CLOSE,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import UpdateFailed
 
 from .const import (
+    CONF_ACTIVITY_STREAM,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_ADAPTIVE_TORRENTS,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_GROUP_SENSORS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_OFFLOAD_THRESHOLD,
+    CONF_OFFLOAD_WORKERS,
+    CONF_REQUEST_METRICS,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_TOP_TORRENTS,
+    CONF_TORRENT_TAG,
     CONTROLLER,
     COORDINATOR,
+    DEFAULT_ACTIVITY_STREAM,
+    DEFAULT_ADAPTIVE_INTERVAL,
+    DEFAULT_ADAPTIVE_TORRENTS,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_GROUP_SENSORS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_OFFLOAD_THRESHOLD,
+    DEFAULT_OFFLOAD_WORKERS,
+    DEFAULT_REQUEST_METRICS,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_TOP_TORRENTS,
     DOMAIN,
     PLATFORMS,
+    STARTUP,
+    STORAGE_VERSION,
+    STREAM,
+    TIER_FAST,
+    TIER_MEDIUM,
+    TIER_SLOW,
     UNDO_UPDATE_LISTENER,
 )
-from .pyflood import FloodApi, FloodCannotConnectError, FloodInvalidAuthError
+from .coordinator import FloodDataUpdateCoordinator
+from .hub import async_get_hub
+from .pyflood import (
+    FloodActivityStream,
+    FloodApi,
+    FloodCannotConnectError,
+    FloodInvalidAuthError,
+)
+from .pyflood.torrents import STATUSES
 
 _LOGGER = logging.getLogger(__name__)
 
+ATTR_TAG = "tag"
+ATTR_TRACKER = "tracker"
+ATTR_STATUS = "status"
+
+SERVICE_ALL_SCHEMA = vol.Schema({vol.Optional(CONF_HOST): cv.string})
+SERVICE_FILTER_SCHEMA = SERVICE_ALL_SCHEMA.extend(
+    {
+        vol.Optional(ATTR_TAG): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_TRACKER): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_STATUS): vol.All(cv.ensure_list, [vol.In(STATUSES)]),
+    }
+)
+
+# Service name to torrent action and schema
+SERVICES = {
+    "stop_all_torrents": ("stop", SERVICE_ALL_SCHEMA),
+    "start_all_torrents": ("start", SERVICE_ALL_SCHEMA),
+    "stop_torrents": ("stop", SERVICE_FILTER_SCHEMA),
+    "start_torrents": ("start", SERVICE_FILTER_SCHEMA),
+    "check_torrents": ("check", SERVICE_FILTER_SCHEMA),
+}
+
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Flood integration."""
     hass.data.setdefault(DOMAIN, {})
+
+    async def control_torrents(call: ServiceCall) -> None:
+        """Start, stop or check the matching torrents of Flood instances."""
+        action = SERVICES[call.service][0]
+        host = call.data.get(CONF_HOST)
+        entries = [
+            data
+            for data in hass.data[DOMAIN].values()
+            if host is None or data[CONTROLLER].host == host
+        ]
+        counts = await asyncio.gather(
+            *[
+                data[CONTROLLER].control_torrents(
+                    action,
+                    call.data.get(ATTR_TAG),
+                    call.data.get(ATTR_TRACKER),
+                    call.data.get(ATTR_STATUS),
+                )
+                for data in entries
+            ]
+        )
+        for data, count in zip(entries, counts):
+            _LOGGER.debug("%s %s torrents on %s", action, count, data[CONTROLLER].host)
+            if count:
+                data[COORDINATOR].async_schedule_categories_refresh(["torrents"])
+
+    for service, (_, schema) in SERVICES.items():
+        hass.services.async_register(DOMAIN, service, control_torrents, schema)
+
     return True
 
 
@@ -42,54 +132,121 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Flood from a config entry."""
     config = entry.data
 
-    session = async_create_clientsession(
-        hass, verify_ssl=False, cookie_jar=CookieJar(unsafe=True)
+    hub = async_get_hub(hass)
+
+    offload_threshold = 1024 * entry.options.get(
+        CONF_OFFLOAD_THRESHOLD, DEFAULT_OFFLOAD_THRESHOLD
     )
 
+    # Instances share a request budget, each has its own connection pool
     controller = FloodApi(
         config[CONF_HOST],
         config[CONF_PORT],
         config[CONF_USERNAME],
         config[CONF_PASSWORD],
-        session=session,
+        budget=hub.budget,
+        metrics=entry.options.get(CONF_REQUEST_METRICS, DEFAULT_REQUEST_METRICS),
+        executor_threshold=offload_threshold,
+        executor_workers=entry.options.get(
+            CONF_OFFLOAD_WORKERS, DEFAULT_OFFLOAD_WORKERS
+        ),
+        # Torrent and top sensors read records, group sensors group counters
+        torrent_records=bool(
+            entry.options.get(CONF_TORRENT_TAG)
+            or entry.options.get(CONF_TOP_TORRENTS, DEFAULT_TOP_TORRENTS)
+        ),
+        torrent_groups=entry.options.get(CONF_GROUP_SENSORS, DEFAULT_GROUP_SENSORS),
+        # Tasks of the entry are cancelled on unload and on shutdown
+        create_task=lambda target: entry.async_create_background_task(
+            hass, target, f"{DOMAIN} {entry.title} {target.__qualname__}"
+        ),
     )
 
-    try:
-        await controller.auth()
-    except FloodInvalidAuthError as exception:
-        raise UpdateFailed("Authentication error on Flood") from exception
-    except FloodCannotConnectError as exception:
-        raise ConfigEntryNotReady from exception
-
-    async def async_update_data():
-        """Fetch data from API."""
-        try:
-            return await controller.global_get()
-        except FloodInvalidAuthError as err:
-            raise UpdateFailed("Authentication error on Flood") from err
-        except FloodCannotConnectError as err:
-            raise UpdateFailed(f"Failed to communicating with API: {err}") from err
+    intervals = {
+        TIER_FAST: entry.options.get(
+            CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL
+        ),
+        TIER_MEDIUM: entry.options.get(
+            CONF_SCAN_INTERVAL, config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        ),
+        TIER_SLOW: entry.options.get(
+            CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL
+        ),
+    }
 
-    scan_interval = config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    adaptive = None
+    if entry.options.get(CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL):
+        adaptive = (
+            entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+        )
 
-    coordinator = DataUpdateCoordinator(
+    coordinator = FloodDataUpdateCoordinator(
         hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=scan_interval),
+        controller,
+        intervals,
+        adaptive,
+        store=_async_get_store(hass, entry),
+        adaptive_torrents=entry.options.get(
+            CONF_ADAPTIVE_TORRENTS, DEFAULT_ADAPTIVE_TORRENTS
+        ),
     )
 
-    await coordinator.async_refresh()
+    # Entities start from the data saved last, Flood is reached in the background
+    restored = await coordinator.async_restore_snapshot()
+    if not restored:
+        try:
+            await controller.auth()
+        except FloodInvalidAuthError as exception:
+            await controller.close()
+            raise UpdateFailed("Authentication error on Flood") from exception
+        except FloodCannotConnectError as exception:
+            await controller.close()
+            raise ConfigEntryNotReady from exception
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+        await coordinator.async_refresh()
+
+        if not coordinator.last_update_success:
+            await controller.close()
+            raise ConfigEntryNotReady
+
+    stream = None
+    if entry.options.get(
+        CONF_ACTIVITY_STREAM,
+        config.get(CONF_ACTIVITY_STREAM, DEFAULT_ACTIVITY_STREAM),
+    ):
+        stream = FloodActivityStream(
+            controller,
+            coordinator.async_handle_stream_update,
+            coordinator.async_handle_stream_connection_change,
+        )
+        coordinator.stream = stream
+
+    startup = None
+    if restored:
+        startup = entry.async_create_background_task(
+            hass,
+            _async_start(hass, entry, controller, coordinator, stream),
+            f"{DOMAIN} {entry.title} startup",
+        )
+    else:
+        _async_start_updates(hass, entry, coordinator, stream)
 
     undo_listener = entry.add_update_listener(_async_update_listener)
 
+    async def async_close(event: Event) -> None:
+        """Close the connections left open when Home Assistant stops."""
+        await controller.close()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_close)
+    )
+
     hass.data[DOMAIN][entry.entry_id] = {
         CONTROLLER: controller,
         COORDINATOR: coordinator,
+        STREAM: stream,
+        STARTUP: startup,
         UNDO_UPDATE_LISTENER: undo_listener,
     }
 
@@ -102,23 +259,45 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         name=controller.host,
     )
 
-    for platform in PLATFORMS:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_setup(entry, platform)
-        )
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    async def stop_all_torrents(call) -> None:
-        """Stop all torrents."""
-        await controller.stop_all()
+    return True
 
-    async def start_all_torrents(call) -> None:
-        """Start all torrents."""
-        await controller.start_all()
 
-    hass.services.async_register(DOMAIN, "stop_all_torrents", stop_all_torrents)
-    hass.services.async_register(DOMAIN, "start_all_torrents", start_all_torrents)
+@callback
+def _async_get_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the store of the data saved last for an entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+
+
+async def _async_start(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    controller: FloodApi,
+    coordinator: FloodDataUpdateCoordinator,
+    stream: FloodActivityStream,
+) -> None:
+    """Authenticate and refresh, then start updates."""
+    try:
+        await controller.auth()
+    except (FloodInvalidAuthError, FloodCannotConnectError) as exception:
+        # Requests authenticate again on the next refreshes
+        _LOGGER.warning("Failed to authenticate with Flood: %s", exception)
+    await coordinator.async_refresh()
+    _async_start_updates(hass, entry, coordinator, stream)
 
-    return True
+
+@callback
+def _async_start_updates(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: FloodDataUpdateCoordinator,
+    stream: FloodActivityStream,
+) -> None:
+    """Stagger the refreshes of the entry and follow the activity stream."""
+    async_get_hub(hass).async_register(entry.entry_id, coordinator)
+    if stream is not None:
+        stream.start()
 
 
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
@@ -128,18 +307,26 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
-    unload_ok = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, component)
-                for component in PLATFORMS
-            ]
-        )
-    )
+    if (startup := hass.data[DOMAIN][entry.entry_id][STARTUP]) is not None:
+        startup.cancel()
+
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     hass.data[DOMAIN][entry.entry_id][UNDO_UPDATE_LISTENER]()
+    if hass.data[DOMAIN][entry.entry_id][STREAM] is not None:
+        hass.data[DOMAIN][entry.entry_id][STREAM].stop()
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        data[COORDINATOR].async_cancel_stagger()
+        data[COORDINATOR].async_cancel_scheduled_refresh()
+        await data[COORDINATOR].async_save_snapshot()
+        await data[CONTROLLER].close()
+        async_get_hub(hass).async_unregister(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data saved for an entry."""
+    await _async_get_store(hass, entry).async_remove()
@@ -17,7 +17,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         FloodConnectedEntity(cont, cdnt, "Backend connection", "connected", "status"),
     ]
 
-    async_add_entities(entities, True)
+    async_add_entities(entities)
 
 
 class FloodConnectedEntity(FloodEntity):
@@ -28,8 +28,13 @@ class FloodConnectedEntity(FloodEntity):
         """Return the icon to use in the frontend."""
         return "connectivity"
 
+    def _compute_values(self) -> tuple:
+        """Return the connection status."""
+        if self.coordinator.data.get(self._category):
+            return self.coordinator.data[self._category].get(self._key), None
+        return None, None
+
     @property
     def state(self):
         """Return the state."""
-        if self.coordinator.data.get(self._category):
-            return self.coordinator.data[self._category].get(self._key)
+        return self._state_value
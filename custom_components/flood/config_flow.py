@@ -1,5 +1,4 @@
 """Config flow to configure the Flood integration."""
-from aiohttp import CookieJar
 import voluptuous as vol
 
 from homeassistant import config_entries
@@ -10,9 +9,39 @@ from homeassistant.const import (
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
 )
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.core import callback
 
-from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+from .const import (
+    CONF_ACTIVITY_STREAM,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_ADAPTIVE_TORRENTS,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_GROUP_SENSORS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_OFFLOAD_THRESHOLD,
+    CONF_OFFLOAD_WORKERS,
+    CONF_REQUEST_METRICS,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_SPEED_DEADBAND,
+    CONF_TOP_TORRENTS,
+    CONF_TORRENT_TAG,
+    DEFAULT_ACTIVITY_STREAM,
+    DEFAULT_ADAPTIVE_INTERVAL,
+    DEFAULT_ADAPTIVE_TORRENTS,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_GROUP_SENSORS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_OFFLOAD_THRESHOLD,
+    DEFAULT_OFFLOAD_WORKERS,
+    DEFAULT_REQUEST_METRICS,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_SPEED_DEADBAND,
+    DEFAULT_TOP_TORRENTS,
+    DOMAIN,
+)
 from .pyflood import FloodApi, FloodCannotConnectError, FloodInvalidAuthError
 
 BASE_SCHEMA = vol.Schema(
@@ -20,6 +49,7 @@ BASE_SCHEMA = vol.Schema(
         vol.Required(CONF_HOST): str,
         vol.Required(CONF_PORT, default=80): int,
         vol.Required(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
+        vol.Required(CONF_ACTIVITY_STREAM, default=DEFAULT_ACTIVITY_STREAM): bool,
         vol.Optional(CONF_USERNAME): str,
         vol.Optional(CONF_PASSWORD): str,
     }
@@ -33,6 +63,12 @@ class FloodConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_POLL
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return FloodOptionsFlowHandler(config_entry)
+
     async def async_step_user(self, user_input=None):
         """Handle a flow initialized by the user."""
         errors = {}
@@ -46,30 +82,131 @@ class FloodConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if entry:
             self._abort_if_unique_id_configured()
 
-        session = async_create_clientsession(
-            self.hass, verify_ssl=False, cookie_jar=CookieJar(unsafe=True)
-        )
-
-        controller = FloodApi(
+        async with FloodApi(
             user_input.get(CONF_HOST),
             user_input.get(CONF_PORT),
             user_input.get(CONF_USERNAME),
             user_input.get(CONF_PASSWORD),
-            session=session,
-        )
-
-        try:
-            await controller.auth()
-            await controller.connected
-        except FloodInvalidAuthError:
-            errors["base"] = "invalid_auth"
-            return self.async_show_form(
-                step_id="user", data_schema=BASE_SCHEMA, errors=errors
-            )
-        except FloodCannotConnectError:
-            errors["base"] = "cannot_connect"
-            return self.async_show_form(
-                step_id="user", data_schema=BASE_SCHEMA, errors=errors
-            )
+        ) as controller:
+            try:
+                await controller.auth()
+                await controller.connected
+            except FloodInvalidAuthError:
+                errors["base"] = "invalid_auth"
+                return self.async_show_form(
+                    step_id="user", data_schema=BASE_SCHEMA, errors=errors
+                )
+            except FloodCannotConnectError:
+                errors["base"] = "cannot_connect"
+                return self.async_show_form(
+                    step_id="user", data_schema=BASE_SCHEMA, errors=errors
+                )
 
         return self.async_create_entry(title=user_input.get(CONF_HOST), data=user_input)
+
+
+class FloodOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Flood options."""
+
+    def __init__(self, config_entry):
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            if user_input[CONF_MIN_SCAN_INTERVAL] > user_input[CONF_MAX_SCAN_INTERVAL]:
+                errors[CONF_MAX_SCAN_INTERVAL] = "max_below_min"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        # The form is shown again with the values entered
+        options = {**self.config_entry.options, **(user_input or {})}
+        data = self.config_entry.data
+        options_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_FAST_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL
+                    ),
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Required(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_SCAN_INTERVAL,
+                        data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                    ),
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Required(
+                    CONF_SLOW_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL
+                    ),
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Required(
+                    CONF_ADAPTIVE_INTERVAL,
+                    default=options.get(
+                        CONF_ADAPTIVE_INTERVAL, DEFAULT_ADAPTIVE_INTERVAL
+                    ),
+                ): bool,
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+                    ),
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                    ),
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Required(
+                    CONF_ADAPTIVE_TORRENTS,
+                    default=options.get(
+                        CONF_ADAPTIVE_TORRENTS, DEFAULT_ADAPTIVE_TORRENTS
+                    ),
+                ): bool,
+                vol.Required(
+                    CONF_ACTIVITY_STREAM,
+                    default=options.get(
+                        CONF_ACTIVITY_STREAM,
+                        data.get(CONF_ACTIVITY_STREAM, DEFAULT_ACTIVITY_STREAM),
+                    ),
+                ): bool,
+                vol.Required(
+                    CONF_SPEED_DEADBAND,
+                    default=options.get(CONF_SPEED_DEADBAND, DEFAULT_SPEED_DEADBAND),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Optional(
+                    CONF_TORRENT_TAG, default=options.get(CONF_TORRENT_TAG, "")
+                ): str,
+                vol.Required(
+                    CONF_GROUP_SENSORS,
+                    default=options.get(CONF_GROUP_SENSORS, DEFAULT_GROUP_SENSORS),
+                ): bool,
+                vol.Required(
+                    CONF_TOP_TORRENTS,
+                    default=options.get(CONF_TOP_TORRENTS, DEFAULT_TOP_TORRENTS),
+                ): vol.All(int, vol.Range(min=0, max=50)),
+                vol.Required(
+                    CONF_OFFLOAD_THRESHOLD,
+                    default=options.get(
+                        CONF_OFFLOAD_THRESHOLD, DEFAULT_OFFLOAD_THRESHOLD
+                    ),
+                ): vol.All(int, vol.Range(min=0)),
+                vol.Required(
+                    CONF_OFFLOAD_WORKERS,
+                    default=options.get(CONF_OFFLOAD_WORKERS, DEFAULT_OFFLOAD_WORKERS),
+                ): vol.All(int, vol.Range(min=0, max=8)),
+                vol.Required(
+                    CONF_REQUEST_METRICS,
+                    default=options.get(CONF_REQUEST_METRICS, DEFAULT_REQUEST_METRICS),
+                ): bool,
+            }
+        )
+        return self.async_show_form(
+            step_id="init", data_schema=options_schema, errors=errors
+        )
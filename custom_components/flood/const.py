@@ -3,6 +3,106 @@ DOMAIN = "flood"
 
 CONTROLLER = "controller"
 COORDINATOR = "coordinator"
+STREAM = "stream"
 PLATFORMS = ["sensor", "binary_sensor", "select"]
 UNDO_UPDATE_LISTENER = "undo_update_listener"
+STARTUP = "startup"
 DEFAULT_SCAN_INTERVAL = 60
+
+CONF_ACTIVITY_STREAM = "activity_stream"
+DEFAULT_ACTIVITY_STREAM = True
+# Categories kept up to date by the activity stream while it is connected
+STREAM_CATEGORIES = ["transfer", "torrents", "connected"]
+
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+# Transfer rates follow the torrents unless a shorter interval is chosen
+DEFAULT_FAST_SCAN_INTERVAL = DEFAULT_SCAN_INTERVAL
+DEFAULT_SLOW_SCAN_INTERVAL = 600
+
+CONF_ADAPTIVE_INTERVAL = "adaptive_interval"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_ADAPTIVE_TORRENTS = "adaptive_torrents"
+DEFAULT_ADAPTIVE_INTERVAL = False
+DEFAULT_ADAPTIVE_TORRENTS = False
+DEFAULT_MIN_SCAN_INTERVAL = 5
+DEFAULT_MAX_SCAN_INTERVAL = 300
+# Seconds without change before refreshing categories changed from Home Assistant
+SCHEDULED_REFRESH_DELAY = 2
+
+# Categories refreshed at the adaptive interval. The torrent list, much larger
+# than the history, only follows it when the option is enabled.
+ADAPTIVE_CATEGORIES = ["transfer"]
+# Change of the summed transfer rates in B/s considered as activity
+ADAPTIVE_RATE_CHANGE = 10240
+
+# Last data saved to start entities without waiting for Flood
+STORAGE_VERSION = 1
+# Seconds between saves of the last data
+SNAPSHOT_SAVE_DELAY = 60
+# Keys saved of the categories whose other keys are not used by entities
+SNAPSHOT_KEYS = {
+    "client_settings": ["throttleGlobalDownSpeed", "throttleGlobalUpSpeed"],
+    "settings": ["speedLimits"],
+}
+
+TIER_FAST = "fast"
+TIER_MEDIUM = "medium"
+TIER_SLOW = "slow"
+# Refresh tier of each data category, the medium tier uses the scan interval.
+# Transfer rates are summed from torrents when they are refreshed too, the
+# history is only downloaded when the fast tier is due on its own.
+CATEGORY_TIERS = {
+    "transfer": TIER_FAST,
+    "torrents": TIER_MEDIUM,
+    "last_notification": TIER_MEDIUM,
+    "connected": TIER_MEDIUM,
+    "client_settings": TIER_SLOW,
+    "settings": TIER_SLOW,
+}
+
+# Event fired for each new notification of these types
+EVENT_NOTIFICATION = "flood_notification"
+NOTIFICATION_EVENT_TYPES = [
+    "notification.torrent.finished",
+    "notification.torrent.errored",
+    "notification.feed.torrent.added",
+]
+
+# Tag of the torrents which get their own entity, none if empty
+CONF_TORRENT_TAG = "torrent_tag"
+# Sensors counting torrents by tag and by tracker host
+CONF_GROUP_SENSORS = "group_sensors"
+DEFAULT_GROUP_SENSORS = False
+# Number of fastest torrents listed by top sensors, none if 0
+CONF_TOP_TORRENTS = "top_torrents"
+DEFAULT_TOP_TORRENTS = 0
+
+# Speed changes in kB/s below which speed sensors are not written
+CONF_SPEED_DEADBAND = "speed_deadband"
+DEFAULT_SPEED_DEADBAND = 0
+
+# Measure requests, exposed by diagnostic sensors and diagnostics
+CONF_REQUEST_METRICS = "request_metrics"
+DEFAULT_REQUEST_METRICS = False
+# Responses larger than the threshold in KiB are decoded and aggregated in a
+# pool of worker threads, everything runs in the event loop without worker
+CONF_OFFLOAD_THRESHOLD = "offload_threshold"
+CONF_OFFLOAD_WORKERS = "offload_workers"
+DEFAULT_OFFLOAD_THRESHOLD = 256
+DEFAULT_OFFLOAD_WORKERS = 1
+
+# Endpoint requested for each data category
+CATEGORY_ENDPOINTS = {
+    "client_settings": "client/settings",
+    "settings": "settings",
+    "last_notification": "notifications",
+    "transfer": "history",
+    "torrents": "torrents",
+    "connected": "client/connection-test",
+}
+
+HUB = "flood_hub"
+# Requests per second allowed for all Flood instances together
+DEFAULT_REQUEST_BUDGET = 20
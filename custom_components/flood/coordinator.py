@@ -0,0 +1,362 @@
+"""Coordinator refreshing Flood data categories."""
+from datetime import timedelta
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import (
+    ADAPTIVE_CATEGORIES,
+    ADAPTIVE_RATE_CHANGE,
+    CATEGORY_TIERS,
+    DOMAIN,
+    EVENT_NOTIFICATION,
+    NOTIFICATION_EVENT_TYPES,
+    SCHEDULED_REFRESH_DELAY,
+    SNAPSHOT_KEYS,
+    SNAPSHOT_SAVE_DELAY,
+    STREAM_CATEGORIES,
+)
+from .pyflood import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_FOREGROUND,
+    FloodApi,
+    FloodCannotConnectError,
+    FloodInvalidAuthError,
+    request_priority,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FloodDataUpdateCoordinator(DataUpdateCoordinator):
+    """Refresh each Flood data category at the interval of its tier."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        controller: FloodApi,
+        intervals: dict,
+        adaptive: tuple = None,
+        store: Store = None,
+        adaptive_torrents: bool = False,
+    ):
+        """Initialize the coordinator with the interval in seconds of each tier.
+
+        With adaptive minimum and maximum intervals, transfer rates are
+        refreshed at the minimum while torrents download or rates change, and
+        twice less often after each idle refresh, up to the maximum. Torrents
+        are too with adaptive_torrents, else they keep the interval of their
+        tier.
+
+        The last data is saved to the store when given.
+        """
+        self._intervals = {
+            category: intervals[tier] for category, tier in CATEGORY_TIERS.items()
+        }
+        self._adaptive = adaptive
+        self._adaptive_categories = ADAPTIVE_CATEGORIES + (
+            ["torrents"] if adaptive_torrents else []
+        )
+        if adaptive is not None:
+            for category in self._adaptive_categories:
+                self._intervals[category] = adaptive[0]
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=min(self._intervals.values())),
+        )
+        self._controller = controller
+        self._last_refresh = {}
+        self._requested = set()
+        self._unsub_stagger = None
+        self._scheduled = set()
+        self._unsub_scheduled = None
+        self._store = store
+        self._next_save = None
+        self.stream = None
+        self.updated_categories = set()
+        # Duration in seconds of the last refresh requesting Flood
+        self.refresh_duration = None
+        self.skipped_writes = 0
+
+    async def async_restore_snapshot(self) -> bool:
+        """Set the data saved last, every category being stale.
+
+        Return False when no data was saved.
+        """
+        if self._store is None:
+            return False
+        snapshot = await self._store.async_load()
+        if not snapshot or not snapshot.get("data"):
+            return False
+        data = snapshot["data"]
+        self.data = {**data, "stale": sorted(data)}
+        return True
+
+    async def async_save_snapshot(self) -> None:
+        """Save the data now."""
+        if self._store is not None and self.data:
+            await self._store.async_save(self._snapshot())
+
+    def _snapshot(self) -> dict:
+        """Return the data used by entities, in a compact form."""
+        data = {}
+        for category, value in self.data.items():
+            if category == "stale":
+                continue
+            if category in SNAPSHOT_KEYS and isinstance(value, dict):
+                value = {
+                    key: value[key] for key in SNAPSHOT_KEYS[category] if key in value
+                }
+            data[category] = value
+        return {"data": data}
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners and save the data at most once per delay."""
+        super().async_update_listeners()
+        if self._store is None or not self.data:
+            return
+        now = time.monotonic()
+        if self._next_save is None or now >= self._next_save:
+            self._next_save = now + SNAPSHOT_SAVE_DELAY
+            # The data is taken when written, and on shutdown if still pending
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+    def _due_categories(self) -> list:
+        """Return the categories to refresh on this update."""
+        now = time.monotonic()
+        # Updates can run slightly early, allow half an update interval
+        tolerance = self.update_interval.total_seconds() / 2
+        streamed = self.stream is not None and self.stream.connected
+        due = []
+        for category, interval in self._intervals.items():
+            if streamed and category in STREAM_CATEGORIES:
+                continue
+            last_refresh = self._last_refresh.get(category)
+            if (
+                category in self._requested
+                or last_refresh is None
+                or now - last_refresh >= interval - tolerance
+            ):
+                due.append(category)
+        # Transfer rates are summed from torrents without another request
+        if "torrents" in due and "transfer" not in due:
+            due.append("transfer")
+        return due
+
+    async def _async_update_data(self) -> dict:
+        """Fetch the due categories from API.
+
+        Refreshes requested after a change are sent ahead of polls.
+        """
+        categories = self._due_categories()
+        priority = PRIORITY_FOREGROUND if self._requested else PRIORITY_BACKGROUND
+        self._requested.clear()
+        self.updated_categories = set()
+        if not categories:
+            return self.data
+
+        start = time.perf_counter()
+        try:
+            with request_priority(priority):
+                data = await self._controller.global_get(categories)
+        except FloodInvalidAuthError as err:
+            raise UpdateFailed("Authentication error on Flood") from err
+        except FloodCannotConnectError as err:
+            raise UpdateFailed(f"Failed to communicating with API: {err}") from err
+        finally:
+            self.refresh_duration = time.perf_counter() - start
+        self._async_fire_notifications()
+
+        if data["stale"]:
+            _LOGGER.warning(
+                "Failed to refresh %s from Flood, keeping previous values",
+                ", ".join(data["stale"]),
+            )
+        now = time.monotonic()
+        for category in categories:
+            if category not in data["stale"]:
+                self._last_refresh[category] = now
+
+        # Entities of categories whose value did not change are not updated
+        previous = self.data or {}
+        self.updated_categories = {
+            category
+            for category in categories
+            if category not in previous or data.get(category) != previous[category]
+        }
+        stale = set(previous.get("stale", [])) - set(categories)
+        result = {**previous, **data, "stale": sorted(stale.union(data["stale"]))}
+        if self._adaptive is not None and "transfer" in data:
+            self._adapt_interval(previous.get("transfer"), result)
+        return result
+
+    @callback
+    def _async_fire_notifications(self) -> None:
+        """Fire an event for each new notification, oldest first."""
+        for notification in self._controller.pop_notifications():
+            if notification["type"] in NOTIFICATION_EVENT_TYPES:
+                self.hass.bus.async_fire(
+                    EVENT_NOTIFICATION, {"host": self._controller.host, **notification}
+                )
+
+    def _adapt_interval(self, previous_transfer: dict, data: dict) -> None:
+        """Set the interval of adaptive categories from the torrent activity."""
+        minimum, maximum = self._adaptive
+        transfer = data.get("transfer") or {}
+        download = transfer.get("downloadSpeed") or 0
+        upload = transfer.get("uploadSpeed") or 0
+        changed = previous_transfer is None or (
+            abs(download - (previous_transfer.get("downloadSpeed") or 0))
+            + abs(upload - (previous_transfer.get("uploadSpeed") or 0))
+            > ADAPTIVE_RATE_CHANGE
+        )
+        interval = self._intervals[self._adaptive_categories[0]]
+        if download or changed:
+            interval = minimum
+        elif not (data.get("torrents") or {}).get("active"):
+            interval = min(interval * 2, maximum)
+        self._set_adaptive_interval(interval)
+
+    def _set_adaptive_interval(self, interval: float) -> None:
+        """Set the interval of adaptive categories and of the updates."""
+        for category in self._adaptive_categories:
+            self._intervals[category] = interval
+        update_interval = timedelta(seconds=min(self._intervals.values()))
+        if update_interval != self.update_interval:
+            _LOGGER.debug("Refreshing Flood every %s", update_interval)
+            self.update_interval = update_interval
+
+    @callback
+    def async_stagger(self, fraction: float) -> None:
+        """Shift the refresh schedule by a fraction of each interval."""
+        for category, last_refresh in self._last_refresh.items():
+            self._last_refresh[category] = (
+                last_refresh - fraction * self._intervals[category]
+            )
+        # Refreshing reschedules the next update from now
+        self._unsub_stagger = async_call_later(
+            self.hass,
+            fraction * self.update_interval.total_seconds(),
+            self._async_staggered_refresh,
+        )
+
+    async def _async_staggered_refresh(self, _now) -> None:
+        """Refresh once the stagger delay has elapsed."""
+        self._unsub_stagger = None
+        await self.async_refresh()
+
+    @callback
+    def async_cancel_stagger(self) -> None:
+        """Cancel a pending staggered refresh."""
+        if self._unsub_stagger is not None:
+            self._unsub_stagger()
+            self._unsub_stagger = None
+
+    async def async_request_categories_refresh(self, categories: list) -> None:
+        """Request a refresh including the given categories."""
+        self._requested.update(categories)
+        # Changes made from Home Assistant are followed closely
+        if self._adaptive is not None:
+            self._set_adaptive_interval(self._adaptive[0])
+        await self.async_request_refresh()
+
+    async def async_set_client_settings(self, changes: dict) -> None:
+        """Change client settings, showing the new values right away."""
+        self.async_set_local_data(
+            {"client_settings": {**self.data.get("client_settings", {}), **changes}}
+        )
+        try:
+            await self._controller.set_client_settings(changes)
+        finally:
+            self.async_schedule_categories_refresh(["client_settings"])
+
+    @callback
+    def async_schedule_categories_refresh(self, categories: list) -> None:
+        """Refresh only the given categories, once changes stopped for a delay."""
+        # Changes made from Home Assistant are followed closely
+        if self._adaptive is not None:
+            self._set_adaptive_interval(self._adaptive[0])
+        if self.stream is not None and self.stream.connected:
+            categories = [c for c in categories if c not in STREAM_CATEGORIES]
+        if not categories:
+            return
+        self._scheduled.update(categories)
+        self.async_cancel_scheduled_refresh()
+        self._unsub_scheduled = async_call_later(
+            self.hass, SCHEDULED_REFRESH_DELAY, self._async_scheduled_refresh
+        )
+
+    async def _async_scheduled_refresh(self, _now) -> None:
+        """Fetch the scheduled categories."""
+        self._unsub_scheduled = None
+        categories, self._scheduled = list(self._scheduled), set()
+        try:
+            with request_priority(PRIORITY_FOREGROUND):
+                data = await self._controller.global_get(categories)
+        except (FloodCannotConnectError, FloodInvalidAuthError) as err:
+            _LOGGER.debug("Failed to refresh %s: %s", ", ".join(categories), err)
+            return
+        self._async_fire_notifications()
+        now = time.monotonic()
+        self._last_refresh.update(
+            (category, now) for category in categories if category not in data["stale"]
+        )
+        self.async_set_local_data(
+            {
+                category: value
+                for category, value in data.items()
+                if category in categories and category not in data["stale"]
+            }
+        )
+
+    @callback
+    def async_cancel_scheduled_refresh(self) -> None:
+        """Cancel a pending scheduled refresh."""
+        if self._unsub_scheduled is not None:
+            self._unsub_scheduled()
+            self._unsub_scheduled = None
+
+    @callback
+    def async_set_local_data(self, data: dict) -> None:
+        """Set the data of some categories and update the listeners.
+
+        Listeners are updated directly, as setting the data through the
+        coordinator would postpone the polling of other categories.
+        """
+        previous = self.data or {}
+        self.updated_categories = {
+            category
+            for category, value in data.items()
+            if category not in previous or value != previous[category]
+        }
+        stale = [
+            category for category in previous.get("stale", []) if category not in data
+        ]
+        self.data = {**previous, **data, "stale": stale}
+        self.async_update_listeners()
+
+    @callback
+    def async_handle_stream_update(self, data: dict) -> None:
+        """Push data received from the activity stream."""
+        if "notification_count" in data:
+            self.hass.async_create_task(
+                self.async_request_categories_refresh(["last_notification"])
+            )
+            return
+        self.async_set_local_data(data)
+
+    @callback
+    def async_handle_stream_connection_change(self, connected: bool) -> None:
+        """Poll the streamed categories again when the activity stream is lost."""
+        if not connected:
+            _LOGGER.debug("Flood activity stream lost, polling all data")
+            self.hass.async_create_task(
+                self.async_request_categories_refresh(STREAM_CATEGORIES)
+            )
@@ -0,0 +1,42 @@
+"""Diagnostics support for Flood."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONTROLLER, COORDINATOR, DOMAIN, STREAM
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics of a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    controller = data[CONTROLLER]
+    coordinator = data[COORDINATOR]
+    stream = data[STREAM]
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "refresh_duration_ms": (
+                round(coordinator.refresh_duration * 1000, 3)
+                if coordinator.refresh_duration is not None
+                else None
+            ),
+            "skipped_writes": coordinator.skipped_writes,
+            "stale": coordinator.data.get("stale") if coordinator.data else None,
+        },
+        "stream_connected": stream.connected if stream is not None else None,
+        "torrents": len(controller.torrent_store),
+        "cache": controller.cache_stats,
+        "scheduler": controller.scheduler.as_dict(),
+        "requests": (
+            controller.metrics.as_dict() if controller.metrics is not None else None
+        ),
+    }
@@ -1,5 +1,6 @@
 """Support for the generic Flood entity."""
 
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
@@ -18,6 +19,7 @@ class FloodEntity(CoordinatorEntity):
         icon: str = None,
         attributes: dict = None,
         max_speed_limit: int = 0,
+        deadband: float = 0,
     ):
         """Initialize the entity."""
         super().__init__(coordinator)
@@ -28,6 +30,83 @@ class FloodEntity(CoordinatorEntity):
         self._icon = icon
         self._attributes = attributes
         self._max_speed_limit = max_speed_limit
+        self._deadband = deadband
+        self._was_available = None
+        self._was_stale = None
+        # State and attributes derived from the data when last written
+        self._values = None
+        self.skipped_writes = 0
+
+    async def async_added_to_hass(self) -> None:
+        """Derive the values written when the entity is added."""
+        await super().async_added_to_hass()
+        self._was_available = self.available
+        self._was_stale = self.assumed_state
+        if self._was_available:
+            self._values = self._compute_values()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state when the values, availability or staleness changed."""
+        available = self.available
+        stale = self.assumed_state
+        unchanged = available == self._was_available and stale == self._was_stale
+        if unchanged and not self._is_updated():
+            return
+        values = self._compute_values() if available else None
+        if unchanged and not self._values_changed(values):
+            self.skipped_writes += 1
+            self.coordinator.skipped_writes += 1
+            return
+        self._was_available = available
+        self._was_stale = stale
+        self._values = values
+        self.async_write_ha_state()
+
+    def _is_updated(self) -> bool:
+        """Return True if the category of the entity was refreshed."""
+        return self._category in self.coordinator.updated_categories
+
+    def _compute_values(self) -> tuple:
+        """Return the state and attributes derived from the coordinator data."""
+        return None, None
+
+    def _values_changed(self, values: tuple) -> bool:
+        """Return True if the values differ enough from the written ones."""
+        if self._values is None or values is None:
+            return values != self._values
+        state, previous = values[0], self._values[0]
+        # Changes of numeric states within the deadband are not written
+        if (
+            self._deadband
+            and isinstance(state, (int, float))
+            and isinstance(previous, (int, float))
+        ):
+            return abs(state - previous) >= self._deadband
+        return values != self._values
+
+    @property
+    def _state_value(self):
+        """Return the state derived at the last write."""
+        return self._values[0] if self._values is not None else None
+
+    @property
+    def _attributes_value(self):
+        """Return the attributes derived at the last write."""
+        return self._values[1] if self._values is not None else None
+
+    @property
+    def available(self) -> bool:
+        """Return if the data of the entity category is available."""
+        return super().available and self._category in self.coordinator.data
+
+    @property
+    def assumed_state(self) -> bool:
+        """Return True while the data of the entity category is not refreshed.
+
+        Data saved last is stale until Flood is reached after a restart.
+        """
+        return self._category in self.coordinator.data.get("stale", [])
 
     @property
     def device_info(self):
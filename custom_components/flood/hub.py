@@ -0,0 +1,110 @@
+"""Hub scheduling the refreshes of every Flood instance."""
+from typing import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DEFAULT_REQUEST_BUDGET, HUB
+from .coordinator import FloodDataUpdateCoordinator
+from .pyflood import RequestBudget
+
+# Fractional part of multiples of the golden ratio spread any number of
+# instances evenly over an interval, without knowing it in advance.
+GOLDEN_RATIO_FRACTION = 0.6180339887
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> "FloodHub":
+    """Return the hub shared by all Flood config entries."""
+    if HUB not in hass.data:
+        hass.data[HUB] = FloodHub(hass)
+    return hass.data[HUB]
+
+
+class FloodHub:
+    """Stagger refreshes, share a request budget and sum values of Flood instances."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.budget = RequestBudget(DEFAULT_REQUEST_BUDGET)
+        self.aggregate_owner = None
+        self._coordinators = {}
+        self._slots = {}
+        self._unsub_coordinators = {}
+        self._listeners = []
+        # Callbacks adding the sensors summing every instance, by entry
+        self._aggregate_adders = {}
+
+    @callback
+    def async_register(
+        self, entry_id: str, coordinator: FloodDataUpdateCoordinator
+    ) -> None:
+        """Register the coordinator of an entry and stagger its refreshes."""
+        slot = 0
+        while slot in self._slots.values():
+            slot += 1
+        self._slots[entry_id] = slot
+        self._coordinators[entry_id] = coordinator
+        self._unsub_coordinators[entry_id] = coordinator.async_add_listener(
+            self._async_notify
+        )
+        coordinator.async_stagger((slot * GOLDEN_RATIO_FRACTION) % 1)
+
+    @callback
+    def async_unregister(self, entry_id: str) -> None:
+        """Unregister the coordinator of an entry."""
+        self._slots.pop(entry_id, None)
+        self._coordinators.pop(entry_id, None)
+        if unsub := self._unsub_coordinators.pop(entry_id, None):
+            unsub()
+        self._aggregate_adders.pop(entry_id, None)
+        if self.aggregate_owner == entry_id:
+            self.aggregate_owner = None
+            # The sensors summing every instance move to a remaining entry
+            if self._aggregate_adders:
+                self.aggregate_owner, add_aggregate = next(
+                    iter(self._aggregate_adders.items())
+                )
+                add_aggregate()
+        self._async_notify()
+
+    @callback
+    def async_offer_aggregate(
+        self, entry_id: str, add_aggregate: Callable[[], None]
+    ) -> None:
+        """Let an entry add the sensors summing every instance.
+
+        They are added by the first entry offering to, and by another one
+        when that entry unloads.
+        """
+        self._aggregate_adders[entry_id] = add_aggregate
+        if self.aggregate_owner is None:
+            self.aggregate_owner = entry_id
+            add_aggregate()
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Listen for updates of any instance."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_notify(self) -> None:
+        """Notify listeners that an instance was updated."""
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def total(self, category: str, key: str):
+        """Return the sum of a value over the instances which have it."""
+        values = [
+            coordinator.data[category].get(key)
+            for coordinator in self._coordinators.values()
+            if coordinator.data and coordinator.data.get(category)
+        ]
+        values = [value for value in values if value is not None]
+        return sum(values) if values else None
@@ -1,11 +1,68 @@
 """Get information from Flood."""
 import asyncio
-from operator import itemgetter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import socket
+import time
+from typing import Any, Callable, Coroutine
 
 import aiohttp
 import async_timeout
 
+from .auth import Backoff, FloodAuthManager
+from .budget import RequestBudget
+from .cache import UNCHANGED, FloodResponseCache, body_digest
+from .commands import SettingsQueue
+from .decoder import decode_torrents, loads
+from .exceptions import FloodCannotConnectError, FloodInvalidAuthError
+from .metrics import FloodMetrics
+from .notifications import NotificationTracker
+from .rates import RateStatistics
+from .scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_FOREGROUND,
+    PRIORITY_INTERACTIVE,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+)
+from .session import create_session
+from .stream import FloodActivityStream
+from .torrents import TorrentStore
+
+__all__ = [
+    "UNCHANGED",
+    "FloodActivityStream",
+    "FloodApi",
+    "FloodCannotConnectError",
+    "FloodInvalidAuthError",
+    "FloodMetrics",
+    "NotificationTracker",
+    "PRIORITY_BACKGROUND",
+    "PRIORITY_FOREGROUND",
+    "PRIORITY_INTERACTIVE",
+    "RateStatistics",
+    "RequestBudget",
+    "RequestScheduler",
+    "TorrentStore",
+    "create_session",
+    "request_priority",
+]
+
+# Torrent action to Flood endpoint
+CONTROL_ACTIONS = {
+    "start": "torrents/start",
+    "stop": "torrents/stop",
+    "check": "torrents/check-hash",
+}
+# Maximum number of hashes sent in a single control request
+CONTROL_BATCH_SIZE = 500
+# Notifications requested per page when looking for new ones
+NOTIFICATION_PAGE_SIZE = 10
+# Maximum number of new notifications kept between two pops
+MAX_NEW_NOTIFICATIONS = 100
+
 
 class FloodApi:
     """Class representing the Flood and its API."""
@@ -18,8 +75,29 @@ class FloodApi:
         password: str = None,
         request_timeout: int = 10,
         session: aiohttp.client.ClientSession = None,
+        max_concurrent_requests: int = 4,
+        cache_ttl: float = 3600,
+        cache_size: int = 32,
+        budget: RequestBudget = None,
+        metrics: bool = False,
+        decoder: Callable[[bytes], Any] = loads,
+        executor_threshold: int = 256 * 1024,
+        executor_workers: int = None,
+        scheduler: RequestScheduler = None,
+        create_task: Callable[[Coroutine], asyncio.Future] = asyncio.ensure_future,
+        torrent_records: bool = False,
+        torrent_groups: bool = False,
     ) -> None:
-        """Init a Flood API."""
+        """Init a Flood API.
+
+        Requests are run by the scheduler, which APIs of a same host can
+        share, or by a scheduler of max_concurrent_requests of their own.
+        Background work, such as the activity stream, is started by
+        create_task so that the application can track it.
+
+        Polled torrent lists are only counted by status, unless records of
+        each torrent or counters by tag and tracker are asked for.
+        """
         self._host = host
         self._port = port
         self._username = username
@@ -31,46 +109,211 @@ class FloodApi:
 
         self._session = session
         self._close_session = False
+        # The activity stream keeps a connection of its own
+        self._pool_size = max_concurrent_requests + 1
+
+        self.scheduler = scheduler or RequestScheduler(max_concurrent_requests)
+        self.create_task = create_task
+        self._budget = budget
+        self._backoff = Backoff()
+        self._auth = FloodAuthManager(self._login, self._backoff, create_task)
+        self._cache = FloodResponseCache(cache_ttl, cache_size) if cache_size else None
+        self._data = {}
+        self._settings_queue = SettingsQueue(
+            self._patch_client_settings, create_task=create_task
+        )
+        self.metrics = FloodMetrics() if metrics else None
+        self._decoder = decoder
+        # Bodies larger than this many bytes are decoded in an executor: the
+        # default one of the loop, or a pool of executor_workers threads.
+        # Everything is decoded on the loop with no worker.
+        self._executor_threshold = executor_threshold
+        self._executor = None
+        if executor_workers:
+            self._executor = ThreadPoolExecutor(
+                executor_workers, thread_name_prefix="pyflood"
+            )
+        elif executor_workers == 0:
+            self._executor_threshold = None
+        self.torrent_store = TorrentStore()
+        self._torrent_records = torrent_records
+        self._torrent_groups = torrent_groups
+        self.rates = RateStatistics()
+        self._torrents_revision = None
+        # Key of the last notification seen and its formatted value
+        self._last_notification = (None, None)
+        self._notification_tracker = NotificationTracker()
+        self._new_notifications = deque(maxlen=MAX_NEW_NOTIFICATIONS)
 
     async def _request(
-        self, url: str, method: str, content: dict = None, params: dict = None
+        self,
+        url: str,
+        method: str,
+        content: dict = None,
+        params: dict = None,
+        use_cache: bool = True,
+        cache_value: bool = True,
+        authenticate: bool = True,
+        decode: Callable[[bytes], Any] = None,
     ) -> dict:
-        """Make a request to get data."""
-        try_count = 0
+        """Make a request to get data.
+
+        On an expired session, authenticate once again and retry. Requests
+        fail immediately while backing off after connection errors.
+
+        GET responses are cached: unchanged responses are not decoded again
+        and the cached value is returned, or UNCHANGED when cache_value is
+        False and only the response validators are kept.
+
+        Bodies are decoded by decode if given, by the API decoder otherwise.
+
+        Requests run at the priority of the context, see request_priority.
+        Interactive ones are not counted in the request budget.
+        """
+        metrics = self.metrics
+        priority = current_priority()
+        endpoint = url[len(self._api_url) :]
+        reauthenticated = False
         while True:
-            try_count += 1
-            if self._session is None:
-                jar = aiohttp.CookieJar(unsafe=True)
-                self._session = aiohttp.ClientSession(
-                    headers={"Content-Type": "application/json"}, cookie_jar=jar
-                )
-                self._close_session = True
+            self._backoff.check()
+            session = self._get_session()
+
+            cache_key = None
+            entry = None
+            if self._cache is not None and use_cache and method == "GET":
+                cache_key = self._cache.key(url, params)
+                if not cache_value:
+                    # Entries without a value must not answer requests for one
+                    cache_key += "#validators"
+                entry = self._cache.get(cache_key)
 
             try:
-                with async_timeout.timeout(self._request_timeout):
-                    response = await self._session.request(
-                        method=method, url=url, json=content, params=params
-                    )
+                if self._budget is not None and priority != PRIORITY_INTERACTIVE:
+                    await self._budget.acquire()
+                async with self.scheduler.slot(priority):
+                    start = time.perf_counter() if metrics is not None else 0
+                    async with async_timeout.timeout(self._request_timeout):
+                        async with session.request(
+                            method=method,
+                            url=url,
+                            json=content,
+                            params=params,
+                            headers=FloodResponseCache.conditional_headers(entry),
+                        ) as response:
+                            body = await response.read()
             except asyncio.TimeoutError as exception:
-                raise FloodCannotConnectError(
+                error = FloodCannotConnectError(
                     "Timeout occurred while connecting to Flood."
-                ) from exception
+                )
+                self._backoff.failure(error)
+                if metrics is not None:
+                    metrics.record_error(endpoint)
+                raise error from exception
             except (aiohttp.ClientError, socket.gaierror) as exception:
-                raise FloodCannotConnectError(
+                error = FloodCannotConnectError(
                     "Error occurred while communicating with Flood."
-                ) from exception
+                )
+                self._backoff.failure(error)
+                if metrics is not None:
+                    metrics.record_error(endpoint)
+                raise error from exception
+            if metrics is not None:
+                metrics.record_response(
+                    endpoint, time.perf_counter() - start, len(body)
+                )
+                if response.status >= 400:
+                    metrics.record_error(endpoint)
+
+            # Flood answered, only transport errors and failed logins back off
+            self._backoff.success()
             if response.status == 401:
-                if try_count < 3:
-                    self.auth()
+                retry = authenticate and not reauthenticated
+                if metrics is not None:
+                    metrics.record_unauthorized(endpoint, retry)
+                if retry:
+                    await self.auth()
+                    reauthenticated = True
                     continue
                 raise FloodInvalidAuthError("Authentication failed with Flood.")
+            if response.status >= 400:
+                raise FloodCannotConnectError(
+                    f"Flood answered {response.status} to {method} {endpoint}."
+                )
 
-            if response.status:  # == 200:
-                result = await response.json()
-                response.close()
-                return result
-            else:
-                raise FloodCannotConnectError("Unknown error")
+            if cache_key is not None and response.status in (200, 304):
+                return await self._cached_result(
+                    cache_key, entry, response, body, cache_value, endpoint, decode
+                )
+            return await self._decode(endpoint, body, decode)
+
+    async def _decode(self, endpoint: str, body: bytes, decode=None):
+        """Decode a response body, in an executor if it is large.
+
+        The decoding is timed when metrics are enabled.
+        """
+        if not body:
+            return None
+        decode = decode or self._decoder
+        start = time.perf_counter() if self.metrics is not None else 0
+        if self._executor_threshold is not None and (
+            len(body) > self._executor_threshold
+        ):
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, decode, body
+            )
+        else:
+            result = decode(body)
+        if self.metrics is not None:
+            self.metrics.record_decode(endpoint, time.perf_counter() - start)
+        return result
+
+    async def _cached_result(
+        self,
+        key: str,
+        entry,
+        response: aiohttp.ClientResponse,
+        body: bytes,
+        keep,
+        endpoint: str,
+        decode=None,
+    ):
+        """Return the cached value of an unchanged response, or cache a new one."""
+        if response.status == 304 and entry is not None:
+            digest = entry.digest
+        else:
+            digest = body_digest(body)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if entry is not None and entry.digest == digest:
+            self._cache.hits += 1
+            self._cache.store(
+                key,
+                etag or entry.etag,
+                last_modified or entry.last_modified,
+                digest,
+                entry.value,
+            )
+            return entry.value if keep else UNCHANGED
+
+        self._cache.misses += 1
+        result = await self._decode(endpoint, body, decode)
+        self._cache.store(key, etag, last_modified, digest, result if keep else None)
+        return result
+
+    @property
+    def cache_stats(self) -> dict:
+        """Return the response cache hit and miss counts."""
+        if self._cache is None:
+            return {}
+        return self._cache.stats
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the client session, creating one if none was given."""
+        if self._session is None:
+            self._session = create_session(limit=self._pool_size)
+            self._close_session = True
+        return self._session
 
     @property
     def host(self) -> str:
@@ -85,14 +328,27 @@ class FloodApi:
         )
         return data.get("isConnected") is True
 
-    @property
-    async def history(self) -> dict:
-        """Get all client settings."""
-        history = await self._request(
+    async def history_series(self, snapshot: str = "FIVE_MINUTE") -> dict:
+        """Get the transfer history series."""
+        return await self._request(
             method="GET",
             url=self._api_url + "history",
-            params={"snapshot": "FIVE_MINUTE"},
+            params={"snapshot": snapshot},
         )
+
+    @property
+    async def history(self) -> dict:
+        """Get current transfer rates from the last point of the history.
+
+        The rate statistics are seeded with the previous points when empty.
+        """
+        history = await self.history_series()
+        if not self.rates and history.get("timestamps"):
+            self.rates.extend(
+                [timestamp / 1000 for timestamp in history["timestamps"][:-1]],
+                history.get("download", []),
+                history.get("upload", []),
+            )
         return {
             "downloadSpeed": history.get("download")[-1]
             if history.get("download")
@@ -101,131 +357,333 @@ class FloodApi:
         }
 
     async def auth(self) -> None:
+        """Authenticate, concurrent callers share the same login."""
+        await self._auth.authenticate()
+
+    async def _login(self) -> None:
         """Get authentication status after send credentials."""
-        data = await self._request(
-            method="POST",
-            url=self._api_url + "auth/authenticate",
-            content={"username": self._username, "password": self._password},
-        )
-        if "success" not in data:
+        # Every other request waits for the login
+        with request_priority(PRIORITY_INTERACTIVE):
+            data = await self._request(
+                method="POST",
+                url=self._api_url + "auth/authenticate",
+                content={"username": self._username, "password": self._password},
+                authenticate=False,
+            )
+        if not data or "success" not in data:
             raise FloodInvalidAuthError()
 
-    async def global_get(self) -> dict:
-        """Get all data."""
+    async def global_get(self, categories: list = None) -> dict:
+        """Get all data, each category being requested concurrently.
+
+        Only the given categories are requested when set. A category which
+        fails keeps its previous value and is listed in the "stale" key.
+        Errors are only raised when every category failed.
+
+        When torrents are requested too, transfer rates are summed from them
+        instead of downloading the history, unless the rate statistics are
+        still to be seeded from it. Transfer totals are only known from the
+        activity stream, the torrent totals leave out removed torrents.
+        """
+        fetchers = self._fetchers()
+        if categories is not None:
+            fetchers = {
+                category: fetch
+                for category, fetch in fetchers.items()
+                if category in categories
+            }
+        sum_transfer = (
+            "transfer" in fetchers and "torrents" in fetchers and len(self.rates) > 0
+        )
+        if sum_transfer:
+            del fetchers["transfer"]
+        results = await asyncio.gather(
+            *[fetch() for fetch in fetchers.values()], return_exceptions=True
+        )
+
+        data = {}
+        stale = []
+        errors = []
+        for category, result in zip(fetchers, results):
+            if isinstance(result, Exception):
+                errors.append(result)
+                stale.append(category)
+                if category in self._data:
+                    data[category] = self._data[category]
+            else:
+                data[category] = result
+
+        if errors and len(errors) == len(fetchers):
+            raise errors[0]
+
+        if sum_transfer:
+            if "torrents" in stale:
+                stale.append("transfer")
+                if "transfer" in self._data:
+                    data["transfer"] = self._data["transfer"]
+            else:
+                data["transfer"] = self.torrent_store.transfer_rates()
+        if "transfer" in data and "transfer" not in stale:
+            self.record_rates(data["transfer"])
+
+        self._data.update(data)
+        data["stale"] = stale
+        return data
+
+    def record_rates(self, transfer: dict) -> None:
+        """Add the current transfer rates to the rate statistics."""
+        self.rates.add(
+            time.time(),
+            transfer.get("downloadSpeed") or 0,
+            transfer.get("uploadSpeed") or 0,
+        )
+
+    def _fetchers(self) -> dict:
+        """Return the method fetching each data category."""
         return {
-            "client_settings": await self._request(
-                method="GET", url=self._api_url + "client/settings"
-            ),
-            "settings": await self._request(
-                method="GET", url=self._api_url + "settings"
-            ),
-            "last_notification": await self.last_notification(),
-            "history": await self.history,
-            "torrents": await self.torrents(),
-            "connected": {"status": await self.connected},
+            "client_settings": self.client_settings,
+            "settings": self.settings,
+            "last_notification": self.last_notification,
+            "transfer": lambda: self.history,
+            "torrents": self.torrents,
+            "connected": self._connection_status,
         }
 
+    @property
+    def categories(self) -> list:
+        """Return the data categories returned by global_get."""
+        return list(self._fetchers())
+
+    async def _connection_status(self) -> dict:
+        """Get connection status to the torrent client."""
+        return {"status": await self.connected}
+
     async def client_settings(self) -> dict:
         """Get all client settings."""
         return await self._request(method="GET", url=self._api_url + "client/settings")
 
-    async def notifications(self) -> dict:
-        """Get all notifications."""
-        return await self._request(method="GET", url=self._api_url + "notifications")
-
-    async def last_notification(self):
-        """Get last notifications."""
-        NOTIF = "notifications"
-        api_notifications = await self._request(method="GET", url=self._api_url + NOTIF)
-        if NOTIF not in api_notifications or not api_notifications[NOTIF]:
-            return {"title": "No notification"}
+    async def settings(self) -> dict:
+        """Get Flood settings."""
+        return await self._request(method="GET", url=self._api_url + "settings")
+
+    async def notifications(self, start: int = 0, limit: int = None) -> dict:
+        """Get notifications, newest first, from start and up to limit."""
+        params = {"start": start}
+        if limit is not None:
+            params["limit"] = limit
+        return await self._request(
+            method="GET", url=self._api_url + "notifications", params=params
+        )
 
-        last_notification = api_notifications[NOTIF][0]
+    async def iter_notifications(self, page_size: int = 100):
+        """Iterate over all notifications, newest first, a page at a time."""
+        start = 0
+        while True:
+            page = await self.notifications(start, page_size)
+            notifications = page.get("notifications") or []
+            for notification in notifications:
+                yield notification
+            if len(notifications) < page_size:
+                return
+            start += page_size
 
-        torrent_name = last_notification.get("data").get(
-            "name", last_notification.get("data").get("title", "torrent name not found")
+    async def last_notification(self):
+        """Get last notifications, keeping those not seen before.
+
+        Pages are requested until a notification already seen. Notifications
+        older than the first call are not kept.
+        """
+        tracker = self._notification_tracker
+        last_notification = None
+        new = []
+        async for notification in self.iter_notifications(NOTIFICATION_PAGE_SIZE):
+            if last_notification is None:
+                last_notification = notification
+            if (
+                not tracker.primed
+                or not tracker.is_new(notification)
+                or len(new) == MAX_NEW_NOTIFICATIONS
+            ):
+                break
+            new.append(notification)
+
+        if last_notification is None:
+            # Notifications which appear later are new
+            tracker.add([])
+            self._last_notification = (None, {"title": "No notification"})
+            return self._last_notification[1]
+
+        if tracker.primed:
+            new.reverse()
+            tracker.add(new)
+            self._new_notifications.extend(new)
+        else:
+            tracker.add([last_notification])
+
+        key = (last_notification.get("_id"), last_notification.get("ts"))
+        if self._last_notification[0] != key:
+            self._last_notification = (
+                key,
+                self._format_notification(last_notification),
+            )
+        return self._last_notification[1]
+
+    def pop_notifications(self) -> list:
+        """Return the notifications not seen before, oldest first, and forget them.
+
+        Each is formatted, with its id and timestamp in milliseconds.
+        """
+        notifications = [
+            {
+                **self._format_notification(notification),
+                "id": notification.get("_id"),
+                "timestamp": notification.get("ts"),
+            }
+            for notification in self._new_notifications
+        ]
+        self._new_notifications.clear()
+        return notifications
+
+    @staticmethod
+    def _format_notification(notification: dict) -> dict:
+        """Return the title, type and torrent name of a notification."""
+        torrent_name = notification.get("data").get(
+            "name", notification.get("data").get("title", "torrent name not found")
         )
 
-        type_notification = last_notification.get("id", "notification type not found")
+        type_notification = notification.get("id", "notification type not found")
         if type_notification == "notification.torrent.finished":
             type_notification = "Finished"
         elif type_notification == "notification.torrent.errored":
             type_notification = "Errored"
         elif type_notification == "notification.feed.torrent.added":
-            feed_name = last_notification.get("data").get(
-                "feedLabel", "feed name not found"
-            )
+            feed_name = notification.get("data").get("feedLabel", "feed name not found")
             type_notification = f"Added from {feed_name}"
 
         return {
             "title": f"{type_notification}: {torrent_name}",
-            "type": last_notification.get("id", "notification type not found"),
+            "type": notification.get("id", "notification type not found"),
             "torrent": torrent_name,
         }
 
+    def _torrent_decoder(self, records: bool) -> Callable[[bytes], Any]:
+        """Return the decoder of torrent lists, building records or not."""
+        return partial(decode_torrents, records=records, groups=self._torrent_groups)
+
     async def torrents(self) -> dict:
-        """Get all client settings."""
-        api_torrents = await self._request(method="GET", url=self._api_url + "torrents")
-        torrents = api_torrents["torrents"].values()
-        completed = list(filter(lambda d: "complete" in d["status"], torrents))
-        seeding = list(filter(lambda d: "seeding" in d["status"], torrents))
-        downloading = list(filter(lambda d: "downloading" in d["status"], torrents))
-        active = list(filter(lambda d: "active" in d["status"], torrents))
-        inactive = list(filter(lambda d: "inactive" in d["status"], torrents))
-        stopped = list(filter(lambda d: "stopped" in d["status"], torrents))
+        """Get the number of torrents per status."""
+        await self._update_torrents(self._torrent_records)
+        return self.torrent_store.summary()
+
+    async def _update_torrents(self, records: bool) -> None:
+        """Update the torrent store from the torrent list."""
+        url = self._api_url + "torrents"
+        # The torrent list is large, it is only counted or records of the
+        # fields used are built
+        decode = self._torrent_decoder(records)
+        snapshot = await self._request(
+            method="GET", url=url, cache_value=False, decode=decode
+        )
+        if snapshot is UNCHANGED:
+            if self._torrents_revision == self.torrent_store.revision and (
+                self.torrent_store.has_records or not records
+            ):
+                return
+            # The store was changed by the activity stream since the last poll,
+            # or records are needed
+            snapshot = await self._request(
+                method="GET", url=url, use_cache=False, decode=decode
+            )
+        self.torrent_store.apply_snapshot(snapshot)
+        self._torrents_revision = self.torrent_store.revision
 
-        return {
-            "count": len(torrents),
-            "completed": len(completed),
-            "downloading": len(downloading),
-            "seeding": len(seeding),
-            "stopped": len(stopped),
-            "inactive": len(inactive),
-            "active": len(active),
-        }
+    async def set_client_settings(self, changes: dict) -> None:
+        """Change client settings.
+
+        Changes made meanwhile are merged and sent in a single request.
+        """
+        await self._settings_queue.set(changes)
+
+    async def _patch_client_settings(self, changes: dict) -> None:
+        """Send client setting changes."""
+        with request_priority(PRIORITY_INTERACTIVE):
+            await self._request(
+                method="PATCH", url=self._api_url + "client/settings", content=changes
+            )
 
     async def set_download_limit(self, speed: int) -> None:
         """Set download speed limit in kB/s."""
-        await self._request(
-            method="PATCH",
-            url=self._api_url + "client/settings",
-            content={"throttleGlobalDownSpeed": speed * 1024},
-        )
+        await self.set_client_settings({"throttleGlobalDownSpeed": speed * 1024})
 
     async def set_upload_limit(self, speed: int) -> None:
         """Set upload speed limit in kB/s."""
-        await self._request(
-            method="PATCH",
-            url=self._api_url + "client/settings",
-            content={"throttleGlobalUpSpeed": speed * 1024},
+        await self.set_client_settings({"throttleGlobalUpSpeed": speed * 1024})
+
+    async def control_torrents(
+        self,
+        action: str,
+        tags: list = None,
+        trackers: list = None,
+        statuses: list = None,
+    ) -> int:
+        """Start, stop or check the torrents matching the filters.
+
+        Torrents are taken from the store, the torrent list is downloaded
+        when the store keeps no records. Only those whose state would change
+        are sent, in batches, ahead of polls. Return the number of torrents
+        sent.
+        """
+        if action not in CONTROL_ACTIONS:
+            raise ValueError(f"Unknown torrent action: {action}")
+        with request_priority(PRIORITY_INTERACTIVE):
+            return await self._control_torrents(action, tags, trackers, statuses)
+
+    async def _control_torrents(
+        self, action: str, tags: list, trackers: list, statuses: list
+    ) -> int:
+        """Send the control requests of the torrents matching the filters."""
+        if not self.torrent_store.has_records:
+            await self._update_torrents(records=True)
+
+        records = self.torrent_store.select(tags, trackers, statuses)
+        if action == "start":
+            records = [record for record in records if record.has_status("stopped")]
+        elif action == "stop":
+            records = [record for record in records if not record.has_status("stopped")]
+        hashes = [record.hash for record in records]
+
+        url = self._api_url + CONTROL_ACTIONS[action]
+
+        async def send(batch: list) -> None:
+            """Send a batch, then record the statuses Flood accepted."""
+            await self._request(method="POST", url=url, content={"hashes": batch})
+            # Commands sent before the next update filter on the new statuses
+            if action in ("start", "stop"):
+                self.torrent_store.set_stopped(batch, action == "stop")
+
+        # Concurrency is bounded by the request scheduler
+        await asyncio.gather(
+            *[
+                send(hashes[index : index + CONTROL_BATCH_SIZE])
+                for index in range(0, len(hashes), CONTROL_BATCH_SIZE)
+            ]
         )
+        return len(hashes)
 
     async def stop_all(self) -> None:
         """Stop all torrents."""
-        api_torrents = await self._request(method="GET", url=self._api_url + "torrents")
-        torrents = api_torrents["torrents"].values()
-        torrents_hashes = {"hashes": list(map(itemgetter("hash"), torrents))}
-        await self._request(
-            method="POST",
-            url=self._api_url + "torrents/stop",
-            content=torrents_hashes,
-        )
+        await self.control_torrents("stop")
 
     async def start_all(self) -> None:
         """Start all torrents."""
-        api_torrents = await self._request(method="GET", url=self._api_url + "torrents")
-        torrents = api_torrents.get("torrents", {}).values()
-        torrents_hashes = {"hashes": list(map(itemgetter("hash"), torrents))}
-        await self._request(
-            method="POST",
-            url=self._api_url + "torrents/start",
-            content=torrents_hashes,
-        )
+        await self.control_torrents("start")
 
     async def close(self) -> None:
-        """Close open client session."""
+        """Close open client session and the decoding workers."""
         if self._session and self._close_session:
             await self._session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
 
     async def __aenter__(self):
         """Async enter."""
@@ -234,11 +692,3 @@ class FloodApi:
     async def __aexit__(self, *_exc_info) -> None:
         """Async exit."""
         await self.close()
-
-
-class FloodCannotConnectError(Exception):
-    """Exception to indicate an error in connection."""
-
-
-class FloodInvalidAuthError(Exception):
-    """Exception to indicate an error in authentication."""
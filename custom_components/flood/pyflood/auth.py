@@ -0,0 +1,86 @@
+"""Authenticate to Flood and back off when it fails."""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Coroutine
+
+from .exceptions import FloodCannotConnectError, FloodInvalidAuthError
+
+
+class Backoff:
+    """Exponential backoff with jitter after consecutive failures."""
+
+    def __init__(self, min_delay: float = 2, max_delay: float = 300) -> None:
+        """Init a backoff which is not delaying anything."""
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._delay = 0
+        self._retry_at = 0
+        self._error = None
+
+    @property
+    def remaining(self) -> float:
+        """Return the seconds left before the next attempt is allowed."""
+        return max(0, self._retry_at - time.monotonic())
+
+    def check(self) -> None:
+        """Raise the last error again while backing off."""
+        remaining = self.remaining
+        if remaining:
+            raise type(self._error)(
+                f"{self._error} Next attempt in {remaining:.0f}s."
+            ) from self._error
+
+    def failure(self, error: Exception) -> None:
+        """Record a failure and delay the next attempt.
+
+        Failures of concurrent attempts only count once.
+        """
+        now = time.monotonic()
+        if now < self._retry_at:
+            return
+        self._delay = min(max(self._delay * 2, self._min_delay), self._max_delay)
+        self._retry_at = now + self._delay * random.uniform(0.5, 1.5)
+        self._error = error
+
+    def success(self) -> None:
+        """Reset the backoff after a successful attempt."""
+        self._delay = 0
+        self._retry_at = 0
+        self._error = None
+
+
+class FloodAuthManager:
+    """Share a single Flood login between concurrent callers."""
+
+    def __init__(
+        self,
+        login: Callable[[], Awaitable[None]],
+        backoff: Backoff,
+        create_task: Callable[[Coroutine], asyncio.Future] = asyncio.ensure_future,
+    ) -> None:
+        """Init the manager with the coroutine function logging in."""
+        self._login = login
+        self._backoff = backoff
+        self._create_task = create_task
+        self._task = None
+
+    async def authenticate(self) -> None:
+        """Log in, or wait for the login already in progress."""
+        self._backoff.check()
+        if self._task is None:
+            self._task = self._create_task(self._run_login())
+        # Shielded so that a cancelled caller does not cancel the shared login
+        await asyncio.shield(self._task)
+
+    async def _run_login(self) -> None:
+        """Log in and record the outcome in the backoff."""
+        try:
+            await self._login()
+        except (FloodCannotConnectError, FloodInvalidAuthError) as err:
+            self._backoff.failure(err)
+            raise
+        else:
+            self._backoff.success()
+        finally:
+            self._task = None
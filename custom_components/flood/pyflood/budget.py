@@ -0,0 +1,29 @@
+"""Limit the rate of requests sent to Flood."""
+import asyncio
+import time
+
+
+class RequestBudget:
+    """Token bucket limiting the request rate, which APIs can share."""
+
+    def __init__(self, rate: float, burst: int = None) -> None:
+        """Init a budget of rate requests per second, allowing bursts."""
+        self._rate = rate
+        self._burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = self._burst
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request can be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._updated_at) * self._rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
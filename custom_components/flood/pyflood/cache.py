@@ -0,0 +1,89 @@
+"""Cache Flood API responses."""
+from collections import OrderedDict
+import hashlib
+import time
+
+# Returned instead of a value which is unchanged but was not kept in cache
+UNCHANGED = object()
+
+
+def body_digest(body: bytes) -> bytes:
+    """Return the digest of a response body."""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+class CacheEntry:
+    """Validators and value of a cached response."""
+
+    __slots__ = ("etag", "last_modified", "digest", "value", "stored_at")
+
+    def __init__(
+        self, etag: str, last_modified: str, digest: bytes, value, stored_at: float
+    ) -> None:
+        """Init a cache entry."""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.value = value
+        self.stored_at = stored_at
+
+
+class FloodResponseCache:
+    """Responses cached by URL, evicted after a TTL or when the cache is full."""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 32) -> None:
+        """Init an empty cache."""
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        """Return the cache key of a request."""
+        if not params:
+            return url
+        return url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    def get(self, key: str) -> CacheEntry:
+        """Return the entry of a request if it has not expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self._ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> dict:
+        """Return the headers to send for a conditional request."""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(
+        self, key: str, etag: str, last_modified: str, digest: bytes, value
+    ) -> None:
+        """Store the validators and the value of a response."""
+        self._entries[key] = CacheEntry(
+            etag, last_modified, digest, value, time.monotonic()
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        """Drop the entry of a request."""
+        self._entries.pop(key, None)
+
+    @property
+    def stats(self) -> dict:
+        """Return hit and miss counts."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
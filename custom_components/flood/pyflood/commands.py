@@ -0,0 +1,40 @@
+"""Queue changes of Flood settings."""
+import asyncio
+from typing import Awaitable, Callable, Coroutine
+
+
+class SettingsQueue:
+    """Merge setting changes made in a short time into a single request."""
+
+    def __init__(
+        self,
+        send: Callable[[dict], Awaitable[None]],
+        delay: float = 0.25,
+        create_task: Callable[[Coroutine], asyncio.Future] = asyncio.ensure_future,
+    ) -> None:
+        """Init the queue with the coroutine function sending merged changes."""
+        self._send = send
+        self._delay = delay
+        self._create_task = create_task
+        self._pending = {}
+        self._task = None
+
+    async def set(self, changes: dict) -> None:
+        """Queue changes and wait until they are sent.
+
+        The last value queued for a key is sent.
+        """
+        self._pending.update(changes)
+        if self._task is None:
+            self._task = self._create_task(self._flush())
+        # Shielded so that a cancelled caller does not cancel the others
+        await asyncio.shield(self._task)
+
+    async def _flush(self) -> None:
+        """Send the changes queued until the delay elapsed."""
+        try:
+            await asyncio.sleep(self._delay)
+        finally:
+            self._task = None
+        changes, self._pending = self._pending, {}
+        await self._send(changes)
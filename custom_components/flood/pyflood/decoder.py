@@ -0,0 +1,31 @@
+"""Decode Flood API responses."""
+import json
+
+from .torrents import TorrentSnapshot
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(body: bytes):
+    """Decode a JSON body, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_torrents(
+    body: bytes, records: bool = True, groups: bool = True
+) -> TorrentSnapshot:
+    """Decode a torrent list response into a snapshot of counters and records.
+
+    Only the fields used by the integration are kept, the decoded list is
+    dropped as soon as the snapshot is built. Responses wrap the list with an
+    id, activity stream events send it bare.
+    """
+    torrents = loads(body)
+    if "torrents" in torrents and "id" in torrents:
+        torrents = torrents["torrents"]
+    return TorrentSnapshot(torrents or {}, records, groups)
@@ -0,0 +1,9 @@
+"""Exceptions raised by the Flood API client."""
+
+
+class FloodCannotConnectError(Exception):
+    """Exception to indicate an error in connection."""
+
+
+class FloodInvalidAuthError(Exception):
+    """Exception to indicate an error in authentication."""
@@ -0,0 +1,105 @@
+"""Measure Flood API requests."""
+from bisect import bisect_left
+
+# Upper bounds in milliseconds of the latency histogram buckets
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class EndpointMetrics:
+    """Counters and latency histogram of the requests to an endpoint."""
+
+    __slots__ = (
+        "requests",
+        "errors",
+        "retries",
+        "unauthorized",
+        "bytes_total",
+        "bytes_last",
+        "decode_time",
+        "latency_total",
+        "latency_last",
+        "histogram",
+    )
+
+    def __init__(self) -> None:
+        """Init metrics without any request."""
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.unauthorized = 0
+        self.bytes_total = 0
+        self.bytes_last = 0
+        self.decode_time = 0.0
+        self.latency_total = 0.0
+        self.latency_last = 0.0
+        # The last bucket counts requests slower than every bound
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def as_dict(self) -> dict:
+        """Return the metrics, durations in milliseconds."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "unauthorized": self.unauthorized,
+            "bytes_total": self.bytes_total,
+            "bytes_last": self.bytes_last,
+            "decode_ms": round(self.decode_time * 1000, 3),
+            "latency_last_ms": round(self.latency_last * 1000, 3),
+            "latency_mean_ms": (
+                round(self.latency_total / self.requests * 1000, 3)
+                if self.requests
+                else None
+            ),
+            "histogram": {
+                **{
+                    f"le_{bound}ms": count
+                    for bound, count in zip(LATENCY_BUCKETS, self.histogram)
+                },
+                f"gt_{LATENCY_BUCKETS[-1]}ms": self.histogram[-1],
+            },
+        }
+
+
+class FloodMetrics:
+    """Metrics of the requests to Flood, by endpoint."""
+
+    def __init__(self) -> None:
+        """Init empty metrics."""
+        self._endpoints = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint."""
+        metrics = self._endpoints.get(name)
+        if metrics is None:
+            metrics = self._endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def record_response(self, name: str, latency: float, size: int) -> None:
+        """Record a response and how long it took in seconds."""
+        metrics = self.endpoint(name)
+        metrics.requests += 1
+        metrics.bytes_total += size
+        metrics.bytes_last = size
+        metrics.latency_total += latency
+        metrics.latency_last = latency
+        metrics.histogram[bisect_left(LATENCY_BUCKETS, latency * 1000)] += 1
+
+    def record_decode(self, name: str, duration: float) -> None:
+        """Record the time spent decoding a response."""
+        self.endpoint(name).decode_time += duration
+
+    def record_error(self, name: str) -> None:
+        """Record a failed request."""
+        self.endpoint(name).errors += 1
+
+    def record_unauthorized(self, name: str, retried: bool) -> None:
+        """Record a request rejected for an expired session."""
+        metrics = self.endpoint(name)
+        metrics.unauthorized += 1
+        if retried:
+            metrics.retries += 1
+
+    def as_dict(self) -> dict:
+        """Return the metrics of every endpoint."""
+        return {name: metrics.as_dict() for name, metrics in self._endpoints.items()}
@@ -0,0 +1,43 @@
+"""Track new Flood notifications."""
+from collections import deque
+
+
+class NotificationTracker:
+    """Tell notifications not seen before from a high-water mark and their ids.
+
+    Notifications older than the newest one seen are not new. Ids of the last
+    notifications seen tell apart those with the same timestamp, only a
+    bounded number of them is kept.
+    """
+
+    def __init__(self, max_seen: int = 256) -> None:
+        """Init a tracker which has seen no notification."""
+        # Timestamp in milliseconds of the newest notification seen
+        self.high_water = None
+        # Whether notifications were fetched once, even when there was none
+        self._primed = False
+        self._seen = deque(maxlen=max_seen)
+        self._seen_ids = set()
+
+    @property
+    def primed(self) -> bool:
+        """Return True once notifications were added, even an empty list."""
+        return self._primed
+
+    def is_new(self, notification: dict) -> bool:
+        """Return True if the notification was not seen before."""
+        if self.high_water is not None and notification.get("ts", 0) < self.high_water:
+            return False
+        return notification.get("_id") not in self._seen_ids
+
+    def add(self, notifications: list) -> None:
+        """Mark notifications as seen, oldest first, and the tracker as primed."""
+        self._primed = True
+        for notification in notifications:
+            if len(self._seen) == self._seen.maxlen:
+                self._seen_ids.discard(self._seen[0])
+            self._seen.append(notification.get("_id"))
+            self._seen_ids.add(notification.get("_id"))
+            timestamp = notification.get("ts", 0)
+            if self.high_water is None or timestamp > self.high_water:
+                self.high_water = timestamp
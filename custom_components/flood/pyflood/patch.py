@@ -0,0 +1,62 @@
+"""Apply JSON patch (RFC 6902) operations sent by Flood."""
+
+
+def _unescape(token: str) -> str:
+    """Unescape a JSON pointer token."""
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def split_path(path: str) -> list:
+    """Split a JSON pointer into its tokens."""
+    if not path:
+        return []
+    return [_unescape(token) for token in path.split("/")[1:]]
+
+
+def _child(container, token: str):
+    """Return the child of a container designated by a token."""
+    if isinstance(container, list):
+        return container[int(token)]
+    return container[token]
+
+
+def apply_operation(document, operation: dict):
+    """Apply a single add, remove or replace operation to a document.
+
+    The document is modified in place and returned, as the root itself
+    is replaced when the operation targets the whole document.
+    """
+    op = operation["op"]
+    tokens = split_path(operation["path"])
+    if not tokens:
+        return operation.get("value") if op != "remove" else None
+
+    parent = document
+    for token in tokens[:-1]:
+        parent = _child(parent, token)
+    last = tokens[-1]
+
+    if isinstance(parent, list):
+        if op == "add":
+            index = len(parent) if last == "-" else int(last)
+            parent.insert(index, operation["value"])
+        elif op == "remove":
+            del parent[int(last)]
+        elif op == "replace":
+            parent[int(last)] = operation["value"]
+        else:
+            raise ValueError(f"Unsupported patch operation: {op}")
+    elif op in ("add", "replace"):
+        parent[last] = operation["value"]
+    elif op == "remove":
+        del parent[last]
+    else:
+        raise ValueError(f"Unsupported patch operation: {op}")
+    return document
+
+
+def apply_patch(document, operations: list):
+    """Apply a list of operations to a document."""
+    for operation in operations:
+        document = apply_operation(document, operation)
+    return document
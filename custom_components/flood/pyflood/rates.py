@@ -0,0 +1,126 @@
+"""Rolling statistics of Flood transfer rates."""
+from collections import deque
+import time
+
+# Durations in seconds of the windows of statistics
+WINDOWS = (60, 300, 900)
+
+
+class _Window:
+    """Running totals and peaks of the samples of a window."""
+
+    __slots__ = (
+        "duration",
+        "start",
+        "down_total",
+        "up_total",
+        "down_peaks",
+        "up_peaks",
+    )
+
+    def __init__(self, duration: float) -> None:
+        """Init an empty window."""
+        self.duration = duration
+        # Sequence number of the oldest sample in the window
+        self.start = 0
+        self.down_total = 0
+        self.up_total = 0
+        # Decreasing (sequence number, rate) pairs, the peak comes first
+        self.down_peaks = deque()
+        self.up_peaks = deque()
+
+
+def _push_peak(peaks: deque, sequence: int, value: float) -> None:
+    """Add a sample to decreasing peaks, dropping those it exceeds."""
+    while peaks and peaks[-1][1] <= value:
+        peaks.pop()
+    peaks.append((sequence, value))
+
+
+class RateStatistics:
+    """Mean and peak transfer rates over rolling windows.
+
+    Samples are kept in a ring buffer of fixed capacity, and each window keeps
+    running totals and peaks, so adding a sample takes constant amortized time.
+    When samples come faster than the capacity allows, the longest windows
+    cover less time.
+    """
+
+    def __init__(self, windows: tuple = WINDOWS, capacity: int = 1024) -> None:
+        """Init statistics without any sample."""
+        self._capacity = capacity
+        self._times = [0.0] * capacity
+        self._down = [0] * capacity
+        self._up = [0] * capacity
+        # Number of samples ever added, the sequence number of the next one
+        self._count = 0
+        self._windows = [_Window(duration) for duration in windows]
+
+    def __len__(self) -> int:
+        """Return the number of samples kept."""
+        return min(self._count, self._capacity)
+
+    def add(self, timestamp: float, down_rate: float, up_rate: float) -> None:
+        """Add a sample of the rates in B/s at a time in seconds."""
+        sequence = self._count
+        self._count += 1
+        # The sample overwritten in the ring buffer leaves every window
+        oldest = self._count - self._capacity
+        for window in self._windows:
+            while window.start < oldest:
+                self._evict(window)
+
+        slot = sequence % self._capacity
+        self._times[slot] = timestamp
+        self._down[slot] = down_rate
+        self._up[slot] = up_rate
+        for window in self._windows:
+            window.down_total += down_rate
+            window.up_total += up_rate
+            _push_peak(window.down_peaks, sequence, down_rate)
+            _push_peak(window.up_peaks, sequence, up_rate)
+        self._expire(timestamp)
+
+    def extend(self, timestamps: list, down_rates: list, up_rates: list) -> None:
+        """Add samples in chronological order."""
+        for timestamp, down_rate, up_rate in zip(timestamps, down_rates, up_rates):
+            self.add(timestamp, down_rate, up_rate)
+
+    def stats(self, now: float = None) -> dict:
+        """Return the mean and peak rates of each window, by duration."""
+        self._expire(time.time() if now is None else now)
+        stats = {}
+        for window in self._windows:
+            samples = self._count - window.start
+            if not samples:
+                stats[window.duration] = None
+                continue
+            stats[window.duration] = {
+                "download_mean": window.down_total / samples,
+                "download_peak": window.down_peaks[0][1],
+                "upload_mean": window.up_total / samples,
+                "upload_peak": window.up_peaks[0][1],
+            }
+        return stats
+
+    def _expire(self, now: float) -> None:
+        """Drop the samples older than each window."""
+        for window in self._windows:
+            limit = now - window.duration
+            while (
+                window.start < self._count
+                and self._times[window.start % self._capacity] < limit
+            ):
+                self._evict(window)
+
+    def _evict(self, window: _Window) -> None:
+        """Remove the oldest sample of a window."""
+        sequence = window.start
+        slot = sequence % self._capacity
+        window.down_total -= self._down[slot]
+        window.up_total -= self._up[slot]
+        if window.down_peaks[0][0] == sequence:
+            window.down_peaks.popleft()
+        if window.up_peaks[0][0] == sequence:
+            window.up_peaks.popleft()
+        window.start += 1
@@ -0,0 +1,135 @@
+"""Schedule Flood requests by priority."""
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import heapq
+import itertools
+import time
+
+# Priority classes, lower values are sent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_FOREGROUND = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_FOREGROUND: "foreground",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Priority of the requests made in the current context
+_priority = ContextVar("flood_request_priority", default=PRIORITY_BACKGROUND)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Send the requests made in the context, and tasks it starts, at a priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """Return the priority of the requests made in the current context."""
+    return _priority.get()
+
+
+class RequestScheduler:
+    """Run at most a number of requests at once, the highest priority first.
+
+    Slots are reserved for interactive requests, so that a user command does
+    not wait for polls in flight. Requests of a same priority run in order.
+    """
+
+    def __init__(self, max_concurrent: int = 4, reserved: int = 1) -> None:
+        """Init a scheduler with reserved slots among the concurrent ones."""
+        self._max_concurrent = max_concurrent
+        self._reserved = min(reserved, max_concurrent - 1)
+        self._running = 0
+        # Heap of (priority, sequence number, future) of the waiting requests
+        self._queue = []
+        self._sequence = itertools.count()
+        # Number of requests, total and longest wait in seconds, by priority
+        self._waits = {priority: [0, 0.0, 0.0] for priority in PRIORITY_NAMES}
+
+    @asynccontextmanager
+    async def slot(self, priority: int = None):
+        """Wait for a slot to run a request, at the context priority by default."""
+        if priority is None:
+            priority = current_priority()
+        start = time.monotonic()
+        await self._acquire(priority)
+        wait = time.monotonic() - start
+        waits = self._waits[priority]
+        waits[0] += 1
+        waits[1] += wait
+        waits[2] = max(waits[2], wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _limit(self, priority: int) -> int:
+        """Return the number of requests running at once at a priority."""
+        if priority == PRIORITY_INTERACTIVE:
+            return self._max_concurrent
+        return self._max_concurrent - self._reserved
+
+    async def _acquire(self, priority: int) -> None:
+        """Wait until a request of the priority can run."""
+        queue = self._queue
+        # Waiting requests of the same or a higher priority are not overtaken
+        if self._running < self._limit(priority) and (
+            not queue or queue[0][0] > priority
+        ):
+            self._running += 1
+            return
+        entry = (
+            priority,
+            next(self._sequence),
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(queue, entry)
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].cancelled():
+                queue.remove(entry)
+                heapq.heapify(queue)
+            else:
+                # The slot given just before the cancellation is handed over
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Free a slot and start the waiting requests which can run.
+
+        Limits only grow with priority, so when the first waiting request
+        cannot run, neither can the others.
+        """
+        self._running -= 1
+        queue = self._queue
+        while queue and self._running < self._limit(queue[0][0]):
+            _, _, future = heapq.heappop(queue)
+            self._running += 1
+            future.set_result(None)
+
+    def as_dict(self) -> dict:
+        """Return the running and waiting requests, and waits in milliseconds."""
+        waiting = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        for priority, _, _ in self._queue:
+            waiting[PRIORITY_NAMES[priority]] += 1
+        return {
+            "running": self._running,
+            "waiting": waiting,
+            "waits": {
+                PRIORITY_NAMES[priority]: {
+                    "requests": count,
+                    "wait_mean_ms": round(total / count * 1000, 3) if count else None,
+                    "wait_max_ms": round(longest * 1000, 3),
+                }
+                for priority, (count, total, longest) in self._waits.items()
+            },
+        }
@@ -0,0 +1,26 @@
+"""Create client sessions for Flood hosts."""
+import aiohttp
+
+
+def create_session(
+    limit: int = 8, keepalive_timeout: float = 60, dns_cache_ttl: int = 300
+) -> aiohttp.ClientSession:
+    """Return a client session with a connection pool tuned for one Flood host.
+
+    Connections are kept alive between refreshes, at most limit of them are
+    opened, and host name resolutions are cached.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=dns_cache_ttl,
+        ssl=False,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        cookie_jar=aiohttp.CookieJar(unsafe=True),
+        headers={"Content-Type": "application/json"},
+    )
+
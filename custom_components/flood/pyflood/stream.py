@@ -0,0 +1,200 @@
+"""Follow the Flood activity stream."""
+import asyncio
+import logging
+import random
+from typing import Callable
+
+import aiohttp
+
+from .decoder import loads
+from .exceptions import FloodCannotConnectError, FloodInvalidAuthError
+from .patch import apply_patch
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _unwrap(payload, key: str):
+    """Return the bare payload of an event.
+
+    Flood sends lists, summaries and operations bare, payloads wrapped under
+    key with an id, as in API responses, are accepted too.
+    """
+    if isinstance(payload, dict) and key in payload and "id" in payload:
+        return payload[key]
+    return payload
+
+
+class FloodActivityStream:
+    """Keep Flood state up to date from its server-sent events stream."""
+
+    def __init__(
+        self,
+        api,
+        on_update: Callable[[dict], None],
+        on_connection_change: Callable[[bool], None] = None,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+        read_timeout: float = 300,
+    ) -> None:
+        """Init the activity stream of a Flood API."""
+        self._api = api
+        self._on_update = on_update
+        self._on_connection_change = on_connection_change
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._read_timeout = read_timeout
+        self._task = None
+        self._connected = False
+
+        self._transfer_summary = {}
+        self._notification_count = {}
+
+    @property
+    def connected(self) -> bool:
+        """Return True while the stream is receiving events."""
+        return self._connected
+
+    def start(self) -> None:
+        """Start following the stream in the background."""
+        if self._task is None or self._task.done():
+            self._task = self._api.create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop following the stream, without notifying the listener."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Stopping on purpose, on unload, must not start refreshes
+        self._connected = False
+
+    def _set_connected(self, connected: bool) -> None:
+        """Update the connection state and notify the listener."""
+        if connected == self._connected:
+            return
+        self._connected = connected
+        if self._on_connection_change is not None:
+            self._on_connection_change(connected)
+
+    async def _run(self) -> None:
+        """Follow the stream, reconnecting with an exponential backoff."""
+        backoff = self._min_backoff
+        while True:
+            try:
+                if await self._follow():
+                    backoff = self._min_backoff
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                FloodCannotConnectError,
+                FloodInvalidAuthError,
+            ) as err:
+                _LOGGER.debug("Flood activity stream interrupted: %s", err)
+            except Exception:  # pylint: disable=broad-except
+                # Unexpected events must not leave the streamed data unpolled
+                _LOGGER.exception("Unexpected error in the Flood activity stream")
+            finally:
+                self._set_connected(False)
+
+            delay = backoff * random.uniform(0.5, 1.5)
+            _LOGGER.debug("Reconnecting to Flood activity stream in %.1fs", delay)
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, self._max_backoff)
+
+    async def _follow(self) -> bool:
+        """Read events until the stream ends, return True if any was received."""
+        received = False
+        session = self._api._get_session()
+        async with session.get(
+            self._api._api_url + "activity-stream",
+            params={"historySnapshot": "FIVE_MINUTE"},
+            timeout=aiohttp.ClientTimeout(sock_read=self._read_timeout),
+        ) as response:
+            if response.status == 401:
+                await self._api.auth()
+                return False
+            if response.status != 200:
+                raise FloodCannotConnectError(
+                    f"Activity stream unavailable (HTTP {response.status})"
+                )
+
+            # Full updates are sent as a single line which can be larger than
+            # the reader line limit, so lines are split from raw chunks.
+            pending = []
+            event = None
+            data = []
+            async for chunk in response.content.iter_any():
+                *lines, rest = chunk.split(b"\n")
+                if not lines:
+                    pending.append(rest)
+                    continue
+                pending.append(lines[0])
+                lines[0] = b"".join(pending)
+                pending = [rest]
+                for raw_line in lines:
+                    line = raw_line.decode("utf-8").rstrip("\r")
+                    if not line:
+                        if event is not None and data:
+                            await self._dispatch(event, "\n".join(data))
+                            received = True
+                            self._set_connected(True)
+                        event = None
+                        data = []
+                        continue
+                    if line.startswith(":"):
+                        continue
+                    field, _, value = line.partition(":")
+                    if value.startswith(" "):
+                        value = value[1:]
+                    if field == "event":
+                        event = value
+                    elif field == "data":
+                        data.append(value)
+        return received
+
+    async def _dispatch(self, event: str, data: str) -> None:
+        """Decode the data of an event and apply it."""
+        if event == "TORRENT_LIST_FULL_UPDATE":
+            # Full lists are decoded as polled ones, off the loop when large.
+            # Records are built, diffs are applied to them.
+            snapshot = await self._api._decode(
+                "activity-stream", data, self._api._torrent_decoder(records=True)
+            )
+            self._api.torrent_store.apply_snapshot(snapshot)
+            self._on_update({"torrents": self._api.torrent_store.summary()})
+            return
+        self._handle_event(event, loads(data))
+
+    def _handle_event(self, event: str, payload) -> None:
+        """Apply an event to the local state and push the updated data."""
+        if event == "CLIENT_CONNECTIVITY_STATUS_CHANGE":
+            self._on_update({"connected": {"status": payload.get("isConnected")}})
+        elif event == "TORRENT_LIST_DIFF_CHANGE":
+            self._api.torrent_store.apply_diff(_unwrap(payload, "diff") or [])
+            self._on_update({"torrents": self._api.torrent_store.summary()})
+        elif event == "TRANSFER_SUMMARY_FULL_UPDATE":
+            self._transfer_summary = _unwrap(payload, "transferSummary") or {}
+            self._push_transfer()
+        elif event == "TRANSFER_SUMMARY_DIFF_CHANGE":
+            self._transfer_summary = apply_patch(
+                self._transfer_summary, _unwrap(payload, "diff") or []
+            )
+            self._push_transfer()
+        elif event == "NOTIFICATION_COUNT_CHANGE":
+            if payload != self._notification_count:
+                self._notification_count = payload
+                self._on_update({"notification_count": payload})
+
+    def _push_transfer(self) -> None:
+        """Record the transfer rates and push them."""
+        transfer = self._transfer_rates()
+        self._api.record_rates(transfer)
+        self._on_update({"transfer": transfer})
+
+    def _transfer_rates(self) -> dict:
+        """Return the current transfer rates and session totals."""
+        return {
+            "downloadSpeed": self._transfer_summary.get("downRate", 0),
+            "uploadSpeed": self._transfer_summary.get("upRate", 0),
+            "downloadTotal": self._transfer_summary.get("downTotal"),
+            "uploadTotal": self._transfer_summary.get("upTotal"),
+        }
@@ -0,0 +1,559 @@
+"""Aggregate Flood torrents."""
+import heapq
+from operator import attrgetter
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
+from .patch import apply_operation
+
+STATUSES = ("complete", "seeding", "downloading", "active", "inactive", "stopped")
+STATUS_FLAGS = {status: 1 << index for index, status in enumerate(STATUSES)}
+# Kinds of torrent groups, by tag or by tracker host
+GROUP_KINDS = ("tag", "tracker")
+
+
+def _intern(values, interned: dict) -> tuple:
+    """Return a shared tuple equal to the given values."""
+    values = tuple(values or ())
+    return interned.setdefault(values, values)
+
+
+def _status_flags(status: tuple) -> int:
+    """Return the bit mask of the known statuses."""
+    flags = 0
+    for value in status:
+        flags |= STATUS_FLAGS.get(value, 0)
+    return flags
+
+
+def _tracker_hosts(trackers: tuple, hosts: dict) -> tuple:
+    """Return the hosts of tracker URIs, computed once per interned tuple."""
+    result = hosts.get(trackers)
+    if result is None:
+        result = hosts[trackers] = tuple(
+            dict.fromkeys(urlsplit(uri).hostname or uri for uri in trackers)
+        )
+    return result
+
+
+class TorrentGroup:
+    """Counters of the torrents with a tag or a tracker."""
+
+    __slots__ = ("count", "downloading", "seeding", "down_rate", "up_rate")
+
+    def __init__(self) -> None:
+        """Init a group without torrents."""
+        self.count = 0
+        self.downloading = 0
+        self.seeding = 0
+        self.down_rate = 0
+        self.up_rate = 0
+
+    def add(self, flags: int, count: int, down_rate: float, up_rate: float) -> None:
+        """Add count torrents with the same statuses and their summed rates."""
+        self.count += count
+        if flags & STATUS_FLAGS["downloading"]:
+            self.downloading += count
+        if flags & STATUS_FLAGS["seeding"]:
+            self.seeding += count
+        self.down_rate += down_rate
+        self.up_rate += up_rate
+
+    def copy(self) -> "TorrentGroup":
+        """Return a copy of the group."""
+        group = TorrentGroup.__new__(TorrentGroup)
+        for attribute in self.__slots__:
+            setattr(group, attribute, getattr(self, attribute))
+        return group
+
+    def as_dict(self) -> dict:
+        """Return the counters, rates in B/s."""
+        return {
+            "count": self.count,
+            "downloading": self.downloading,
+            "seeding": self.seeding,
+            "downloadSpeed": self.down_rate,
+            "uploadSpeed": self.up_rate,
+        }
+
+
+class TorrentRecord:
+    """Fields of a Flood torrent used by the integration."""
+
+    __slots__ = (
+        "hash",
+        "name",
+        "status",
+        "flags",
+        "down_rate",
+        "up_rate",
+        "size",
+        "bytes_done",
+        "percent_complete",
+        "ratio",
+        "eta",
+        "tags",
+        "trackers",
+        "revision",
+    )
+
+    # Flood field name to attribute name, list fields are stored as tuples
+    FIELDS = {
+        "name": "name",
+        "status": "status",
+        "downRate": "down_rate",
+        "upRate": "up_rate",
+        "sizeBytes": "size",
+        "bytesDone": "bytes_done",
+        "percentComplete": "percent_complete",
+        "ratio": "ratio",
+        "eta": "eta",
+        "tags": "tags",
+        "trackerURIs": "trackers",
+    }
+    LIST_FIELDS = ("status", "tags", "trackerURIs")
+
+    def __init__(self, torrent_hash: str, torrent: dict, interned: dict) -> None:
+        """Init a record from a Flood torrent.
+
+        Status, tag and tracker lists are shared by many torrents, they are
+        stored once in the interned mapping.
+        """
+        self.hash = torrent_hash
+        self.name = torrent.get("name")
+        self.status = _intern(torrent.get("status"), interned)
+        self.flags = _status_flags(self.status)
+        self.down_rate = torrent.get("downRate", 0)
+        self.up_rate = torrent.get("upRate", 0)
+        self.size = torrent.get("sizeBytes", 0)
+        self.bytes_done = torrent.get("bytesDone", 0)
+        self.percent_complete = torrent.get("percentComplete", 0)
+        self.ratio = torrent.get("ratio", 0)
+        self.eta = torrent.get("eta", -1)
+        self.tags = _intern(torrent.get("tags"), interned)
+        self.trackers = _intern(torrent.get("trackerURIs"), interned)
+        # Store revision of the last change of the torrent
+        self.revision = 0
+
+    def copy(self) -> "TorrentRecord":
+        """Return a copy of the record.
+
+        Attributes are assigned one by one, three times faster than a loop.
+        """
+        record = TorrentRecord.__new__(TorrentRecord)
+        record.hash = self.hash
+        record.name = self.name
+        record.status = self.status
+        record.flags = self.flags
+        record.down_rate = self.down_rate
+        record.up_rate = self.up_rate
+        record.size = self.size
+        record.bytes_done = self.bytes_done
+        record.percent_complete = self.percent_complete
+        record.ratio = self.ratio
+        record.eta = self.eta
+        record.tags = self.tags
+        record.trackers = self.trackers
+        record.revision = self.revision
+        return record
+
+    def has_status(self, status: str) -> bool:
+        """Return True if the torrent has the given status."""
+        return bool(self.flags & STATUS_FLAGS[status])
+
+    def patch(self, operation: dict, interned: dict) -> None:
+        """Apply an operation whose path is relative to the torrent."""
+        field = operation["path"][1:].split("/", 1)[0]
+        attribute = self.FIELDS.get(field)
+        if attribute is None:
+            return
+
+        if field in self.LIST_FIELDS:
+            document = {field: list(getattr(self, attribute))}
+        else:
+            document = {field: getattr(self, attribute)}
+        apply_operation(document, operation)
+        value = document.get(field)
+
+        if field in self.LIST_FIELDS:
+            value = _intern(value, interned)
+        setattr(self, attribute, value if value is not None else 0)
+        if field == "status":
+            self.flags = _status_flags(value)
+
+
+# Values compared to tell if a torrent changed
+_record_values = attrgetter(*TorrentRecord.FIELDS.values())
+
+
+class TorrentSnapshot:
+    """Counters of a full torrent list, and the records of its torrents if kept.
+
+    Counters are computed in a single pass over the torrent list. Records are
+    only built when asked, the same for group counters. A snapshot does not
+    depend on a store, it can be built in a worker thread. It is immutable
+    once built, stores copy the records and counters they change.
+    """
+
+    __slots__ = (
+        "records",
+        "count",
+        "counts",
+        "groups",
+        "interned",
+        "hosts",
+        "down_rate",
+        "up_rate",
+    )
+
+    def __init__(
+        self, torrents: dict, records: bool = True, groups: bool = True
+    ) -> None:
+        """Count the torrents of a Flood torrent list, and build their records.
+
+        Torrents are first counted by statuses, and tags and trackers for
+        groups, which many share. Each combination is then added to its
+        statuses and groups.
+        """
+        combinations = {}
+        interned = {}
+        kept = None
+        if records:
+            kept = {}
+            for torrent_hash, torrent in torrents.items():
+                record = TorrentRecord(torrent_hash, torrent, interned)
+                kept[torrent_hash] = record
+                key = record.status
+                if groups:
+                    key = (key, record.tags, record.trackers)
+                totals = combinations.get(key)
+                if totals is None:
+                    totals = combinations[key] = [0, 0, 0]
+                totals[0] += 1
+                totals[1] += record.down_rate
+                totals[2] += record.up_rate
+        else:
+            for torrent in torrents.values():
+                key = tuple(torrent.get("status") or ())
+                if groups:
+                    key = (
+                        key,
+                        tuple(torrent.get("tags") or ()),
+                        tuple(torrent.get("trackerURIs") or ()),
+                    )
+                totals = combinations.get(key)
+                if totals is None:
+                    totals = combinations[key] = [0, 0, 0]
+                totals[0] += 1
+                totals[1] += torrent.get("downRate", 0)
+                totals[2] += torrent.get("upRate", 0)
+
+        counts = dict.fromkeys(STATUSES, 0)
+        named_groups = {kind: {} for kind in GROUP_KINDS} if groups else None
+        hosts = {}
+        down_rate = 0
+        up_rate = 0
+        for key, totals in combinations.items():
+            status = key[0] if groups else key
+            flags = _status_flags(status)
+            for value, flag in STATUS_FLAGS.items():
+                if flags & flag:
+                    counts[value] += totals[0]
+            down_rate += totals[1]
+            up_rate += totals[2]
+            if not groups:
+                continue
+            for kind, names in (
+                ("tag", key[1]),
+                ("tracker", _tracker_hosts(key[2], hosts)),
+            ):
+                for name in names:
+                    group = named_groups[kind].get(name)
+                    if group is None:
+                        group = named_groups[kind][name] = TorrentGroup()
+                    group.add(flags, *totals)
+
+        self.records = MappingProxyType(kept) if records else None
+        self.count = len(torrents)
+        self.counts = MappingProxyType(counts)
+        self.groups = (
+            MappingProxyType(
+                {kind: MappingProxyType(named) for kind, named in named_groups.items()}
+            )
+            if groups
+            else None
+        )
+        self.interned = MappingProxyType(interned)
+        self.hosts = MappingProxyType(hosts)
+        self.down_rate = down_rate
+        self.up_rate = up_rate
+
+
+class TorrentStore:
+    """Torrents of a Flood instance keyed by hash, with status and rate counters.
+
+    Counters are also kept by tag and by tracker host when snapshots count
+    them. Torrents are only kept when snapshots build their records, which
+    diffs need, and are indexed by tag.
+    """
+
+    def __init__(self) -> None:
+        """Init an empty store."""
+        self._torrents = {}
+        # Hashes of the torrents with each tag, in insertion order
+        self._tagged = {}
+        self._count_total = 0
+        self._counts = dict.fromkeys(STATUSES, 0)
+        self._groups = {kind: {} for kind in GROUP_KINDS}
+        self._grouped = False
+        self._interned = {}
+        self._hosts = {}
+        self._down_rate = 0
+        self._up_rate = 0
+        self.has_records = False
+        self.revision = 0
+
+    def __len__(self) -> int:
+        """Return the number of torrents."""
+        return self._count_total
+
+    def __contains__(self, torrent_hash: str) -> bool:
+        """Return True if the torrent is in the store."""
+        return torrent_hash in self._torrents
+
+    def get(self, torrent_hash: str) -> TorrentRecord:
+        """Return a torrent from its hash."""
+        return self._torrents.get(torrent_hash)
+
+    def select(
+        self, tags: list = None, trackers: list = None, statuses: list = None
+    ) -> list:
+        """Return the torrents matching every given filter.
+
+        A torrent matches a filter when it has one of its tags or statuses, or
+        when one of its tracker URIs contains one of the trackers. With tags,
+        only the torrents indexed under them are looked at.
+        """
+        flags = 0
+        for status in statuses or ():
+            flags |= STATUS_FLAGS[status]
+        # Torrents share interned tuples, match each distinct tuple once
+        tracker_matches = {}
+
+        candidates = self._torrents.values()
+        if tags:
+            hashes = {}
+            for tag in tags:
+                hashes.update(self._tagged.get(tag, {}))
+            candidates = [self._torrents[torrent_hash] for torrent_hash in hashes]
+
+        records = []
+        for record in candidates:
+            if flags and not record.flags & flags:
+                continue
+            if trackers:
+                matched = tracker_matches.get(record.trackers)
+                if matched is None:
+                    matched = any(
+                        tracker in uri
+                        for tracker in trackers
+                        for uri in record.trackers
+                    )
+                    tracker_matches[record.trackers] = matched
+                if not matched:
+                    continue
+            records.append(record)
+        return records
+
+    def replace(
+        self, torrents: dict, records: bool = True, groups: bool = True
+    ) -> None:
+        """Rebuild the store from a full torrent list."""
+        self.apply_snapshot(TorrentSnapshot(torrents, records, groups))
+
+    def apply_snapshot(self, snapshot: TorrentSnapshot) -> None:
+        """Replace the torrents and counters by those of a snapshot.
+
+        Torrents keep their record and revision when their values did not
+        change, the changed ones are copies of the records of the snapshot.
+        """
+        revision = self.revision + 1
+        records = {}
+        if snapshot.records is not None:
+            previous = self._torrents
+            for torrent_hash, record in snapshot.records.items():
+                old = previous.get(torrent_hash)
+                if old is not None and _record_values(old) == _record_values(record):
+                    # Unchanged torrents keep the record already in the store
+                    record = old
+                else:
+                    record = record.copy()
+                    record.revision = revision
+                records[torrent_hash] = record
+
+        self._torrents = records
+        self._tagged = {}
+        for record in records.values():
+            self._tag(record.hash, record.tags, True)
+        self.has_records = snapshot.records is not None
+        self._count_total = snapshot.count
+        self._counts = dict(snapshot.counts)
+        self._grouped = snapshot.groups is not None
+        self._groups = {
+            kind: {
+                name: group.copy()
+                for name, group in (snapshot.groups or {}).get(kind, {}).items()
+            }
+            for kind in GROUP_KINDS
+        }
+        self._interned = dict(snapshot.interned)
+        self._hosts = dict(snapshot.hosts)
+        self._down_rate = snapshot.down_rate
+        self._up_rate = snapshot.up_rate
+        self.revision = revision
+
+    def apply_diff(self, operations: list) -> set:
+        """Apply JSON patch operations on the torrent list.
+
+        Only the counters of the torrents targeted by the operations are
+        updated. Return the hashes of those torrents.
+        """
+        changed = set()
+        self.revision += 1
+        for operation in operations:
+            path = operation["path"]
+            if not path:
+                self.replace(operation.get("value") or {}, groups=self._grouped)
+                changed.update(self._torrents)
+                continue
+
+            _, torrent_hash, *sub_path = path.split("/", 2)
+            torrent_hash = torrent_hash.replace("~1", "/").replace("~0", "~")
+            changed.add(torrent_hash)
+            if not sub_path:
+                if torrent_hash in self._torrents:
+                    self._remove(torrent_hash)
+                if operation["op"] != "remove":
+                    record = TorrentRecord(
+                        torrent_hash, operation["value"], self._interned
+                    )
+                    record.revision = self.revision
+                    self._add(record)
+                continue
+
+            record = self._torrents[torrent_hash]
+            self._count(record, -1)
+            tags = record.tags
+            record.patch({**operation, "path": "/" + sub_path[0]}, self._interned)
+            record.revision = self.revision
+            self._count(record, 1)
+            if record.tags is not tags:
+                self._tag(torrent_hash, tags, False)
+                self._tag(torrent_hash, record.tags, True)
+        return changed
+
+    def set_stopped(self, hashes: list, stopped: bool) -> None:
+        """Mark torrents as stopped or started, once Flood accepted to.
+
+        Only the stopped status changes, the next update brings the others.
+        """
+        self.revision += 1
+        for torrent_hash in hashes:
+            record = self._torrents.get(torrent_hash)
+            if record is None or record.has_status("stopped") == stopped:
+                continue
+            self._count(record, -1)
+            status = [value for value in record.status if value != "stopped"]
+            if stopped:
+                status.append("stopped")
+            record.status = _intern(status, self._interned)
+            record.flags = _status_flags(record.status)
+            record.revision = self.revision
+            self._count(record, 1)
+
+    def summary(self) -> dict:
+        """Return the number of torrents per status."""
+        counts = self._counts
+        return {
+            "count": self._count_total,
+            "completed": counts["complete"],
+            "downloading": counts["downloading"],
+            "seeding": counts["seeding"],
+            "stopped": counts["stopped"],
+            "inactive": counts["inactive"],
+            "active": counts["active"],
+        }
+
+    def transfer_rates(self) -> dict:
+        """Return the current transfer rates, summed over all torrents."""
+        return {"downloadSpeed": self._down_rate, "uploadSpeed": self._up_rate}
+
+    def groups(self, kind: str) -> dict:
+        """Return the counters of each group of a kind, by tag or tracker host."""
+        return {name: group.as_dict() for name, group in self._groups[kind].items()}
+
+    def group(self, kind: str, name: str) -> dict:
+        """Return the counters of a group, None if no torrent is in it."""
+        group = self._groups[kind].get(name)
+        return group.as_dict() if group is not None else None
+
+    def top(self, count: int, rate: str = "down_rate") -> list:
+        """Return the torrents with the highest rate, fastest first.
+
+        Torrents without transfer are left out. A heap bounded to count keeps
+        the fastest torrents while scanning them once.
+        """
+        key = attrgetter(rate)
+        return heapq.nlargest(
+            count, (r for r in self._torrents.values() if key(r)), key=key
+        )
+
+    def _add(self, record: TorrentRecord) -> None:
+        """Add a torrent and count its statuses."""
+        self._torrents[record.hash] = record
+        self._count_total += 1
+        self._count(record, 1)
+        self._tag(record.hash, record.tags, True)
+
+    def _remove(self, torrent_hash: str) -> None:
+        """Remove a torrent and uncount its statuses."""
+        self._count_total -= 1
+        record = self._torrents.pop(torrent_hash)
+        self._count(record, -1)
+        self._tag(torrent_hash, record.tags, False)
+
+    def _tag(self, torrent_hash: str, tags: tuple, add: bool) -> None:
+        """Add a torrent to the index of its tags, or remove it."""
+        tagged = self._tagged
+        for tag in tags:
+            if add:
+                tagged.setdefault(tag, {})[torrent_hash] = None
+            elif tag in tagged:
+                tagged[tag].pop(torrent_hash, None)
+                if not tagged[tag]:
+                    del tagged[tag]
+
+    def _count(self, record: TorrentRecord, delta: int) -> None:
+        """Add delta times a torrent to the status, rate and group counters."""
+        down_rate = delta * record.down_rate
+        up_rate = delta * record.up_rate
+        self._down_rate += down_rate
+        self._up_rate += up_rate
+        counts = self._counts
+        for status, flag in STATUS_FLAGS.items():
+            if record.flags & flag:
+                counts[status] += delta
+        if not self._grouped:
+            return
+        for kind, names in (
+            ("tag", record.tags),
+            ("tracker", _tracker_hosts(record.trackers, self._hosts)),
+        ):
+            groups = self._groups[kind]
+            for name in names:
+                group = groups.get(name)
+                if group is None:
+                    group = groups[name] = TorrentGroup()
+                group.add(record.flags, delta, down_rate, up_rate)
+                if not group.count:
+                    del groups[name]
@@ -32,7 +32,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         ),
     ]
 
-    async_add_entities(entities, True)
+    async_add_entities(entities)
 
 
 class FloodSpeedLimitEntity(FloodEntity, SelectEntity):
@@ -43,15 +43,14 @@ class FloodSpeedLimitEntity(FloodEntity, SelectEntity):
         """Return the icon to use in the frontend."""
         return UnitOfDataRate.KILOBYTES_PER_SECOND
 
-    @property
-    def current_option(self):
-        """Return the state."""
-        byte_value = float(self.coordinator.data.get(self._category, {}).get(self._key))
-        return str(round(byte_value / 1024))
+    def _is_updated(self) -> bool:
+        """Return True if the limit or the Flood presets were refreshed."""
+        return (
+            super()._is_updated() or "settings" in self.coordinator.updated_categories
+        )
 
-    @property
-    def options(self):
-        """Return list of speed limit set in Flood settings."""
+    def _compute_values(self) -> tuple:
+        """Return the current limit and the list of limits set in Flood settings."""
         byte_value = float(self.coordinator.data.get(self._category, {}).get(self._key))
         current = round(byte_value / 1024)
 
@@ -68,13 +67,20 @@ class FloodSpeedLimitEntity(FloodEntity, SelectEntity):
 
         options.sort()
 
-        return [str(i) for i in options]
+        return str(current), [str(i) for i in options]
+
+    @property
+    def current_option(self):
+        """Return the state."""
+        return self._state_value
+
+    @property
+    def options(self):
+        """Return list of speed limit set in Flood settings."""
+        return self._attributes_value or []
 
     async def async_select_option(self, option: str) -> None:
         """Update the current value."""
-        speed = int(option)
-        if self._key == "throttleGlobalDownSpeed":
-            await self._controller.set_download_limit(speed)
-        elif self._key == "throttleGlobalUpSpeed":
-            await self._controller.set_upload_limit(speed)
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_set_client_settings(
+            {self._key: int(option) * 1024}
+        )
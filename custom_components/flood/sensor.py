@@ -1,10 +1,33 @@
 """Support for the Flood sensors."""
 import logging
 
-from homeassistant.const import UnitOfDataRate
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfDataRate,
+    UnitOfTime,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
 
-from .const import CONTROLLER, COORDINATOR, DOMAIN
+from .const import (
+    CATEGORY_ENDPOINTS,
+    CONF_GROUP_SENSORS,
+    CONF_REQUEST_METRICS,
+    CONF_SPEED_DEADBAND,
+    CONF_TOP_TORRENTS,
+    CONF_TORRENT_TAG,
+    CONTROLLER,
+    COORDINATOR,
+    DEFAULT_GROUP_SENSORS,
+    DEFAULT_REQUEST_METRICS,
+    DEFAULT_SPEED_DEADBAND,
+    DEFAULT_TOP_TORRENTS,
+    DOMAIN,
+)
 from .entity import FloodEntity
+from .hub import FloodHub, async_get_hub
+from .pyflood.torrents import GROUP_KINDS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,24 +37,46 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     data = hass.data[DOMAIN][config_entry.entry_id]
     cont = data[CONTROLLER]
     cdnt = data[COORDINATOR]
+    deadband = config_entry.options.get(CONF_SPEED_DEADBAND, DEFAULT_SPEED_DEADBAND)
 
     entities = [
         FloodSpeedSensorEntity(
             cont,
             cdnt,
             "Current Download",
-            "history",
+            "transfer",
             "downloadSpeed",
             "mdi:download",
+            attributes=["downloadTotal"],
+            deadband=deadband,
         ),
         FloodSpeedSensorEntity(
             cont,
             cdnt,
             "Current Upload",
-            "history",
+            "transfer",
             "uploadSpeed",
             "mdi:upload",
+            attributes=["uploadTotal"],
+            deadband=deadband,
         ),
+        *[
+            FloodRateSensorEntity(
+                cont,
+                cdnt,
+                name,
+                "transfer",
+                key,
+                icon,
+                deadband=deadband,
+            )
+            for name, key, icon in (
+                ("Download Average", "download_mean", "mdi:download"),
+                ("Download Peak", "download_peak", "mdi:download"),
+                ("Upload Average", "upload_mean", "mdi:upload"),
+                ("Upload Peak", "upload_peak", "mdi:upload"),
+            )
+        ],
         FloodSensorEntity(
             cont,
             cdnt,
@@ -52,7 +97,112 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         ),
     ]
 
-    async_add_entities(entities, True)
+    if config_entry.options.get(CONF_REQUEST_METRICS, DEFAULT_REQUEST_METRICS):
+        entities.append(
+            FloodDiagnosticSensorEntity(
+                cont, cdnt, "Refresh duration", key=None, icon="mdi:timer-outline"
+            )
+        )
+        entities += [
+            FloodDiagnosticSensorEntity(
+                cont, cdnt, f"Request {endpoint}", key=endpoint, icon="mdi:timer"
+            )
+            for endpoint in CATEGORY_ENDPOINTS.values()
+        ]
+
+    top = config_entry.options.get(CONF_TOP_TORRENTS, DEFAULT_TOP_TORRENTS)
+    if top:
+        entities += [
+            FloodTopSensorEntity(
+                cont, cdnt, "Top Download", "down_rate", top, "mdi:download"
+            ),
+            FloodTopSensorEntity(
+                cont, cdnt, "Top Upload", "up_rate", top, "mdi:upload"
+            ),
+        ]
+
+    async_add_entities(entities)
+
+    # Sensors summing every instance are added once, by one of the entries
+    hub = async_get_hub(hass)
+
+    @callback
+    def async_add_total_entities() -> None:
+        """Add the sensors summing every instance."""
+        async_add_entities(
+            [
+                FloodTotalSensorEntity(
+                    hub, "Total Download", "transfer", "downloadSpeed", "mdi:download"
+                ),
+                FloodTotalSensorEntity(
+                    hub, "Total Upload", "transfer", "uploadSpeed", "mdi:upload"
+                ),
+                FloodTotalSensorEntity(
+                    hub, "Total Torrents", "torrents", "count", "mdi:file"
+                ),
+            ]
+        )
+
+    hub.async_offer_aggregate(config_entry.entry_id, async_add_total_entities)
+
+    # Torrents with the tag get their own sensor, added as they appear
+    tag = config_entry.options.get(CONF_TORRENT_TAG)
+    if tag:
+        store = cont.torrent_store
+        added = set()
+        revision = None
+
+        @callback
+        def async_add_torrent_entities() -> None:
+            """Add sensors for the new torrents with the tag."""
+            nonlocal revision
+            if store.revision == revision:
+                return
+            revision = store.revision
+            torrent_entities = [
+                FloodTorrentSensorEntity(
+                    cont, cdnt, record.hash, record.name or record.hash
+                )
+                for record in store.select(tags=[tag])
+                if record.hash not in added
+            ]
+            added.update(entity.torrent_hash for entity in torrent_entities)
+            if torrent_entities:
+                async_add_entities(torrent_entities)
+
+        async_add_torrent_entities()
+        config_entry.async_on_unload(
+            cdnt.async_add_listener(async_add_torrent_entities)
+        )
+
+    # Tags and trackers get their own sensor, added as they appear
+    if config_entry.options.get(CONF_GROUP_SENSORS, DEFAULT_GROUP_SENSORS):
+        store = cont.torrent_store
+        added_groups = set()
+        group_revision = None
+
+        @callback
+        def async_add_group_entities() -> None:
+            """Add sensors for the new tags and trackers."""
+            nonlocal group_revision
+            if store.revision == group_revision:
+                return
+            group_revision = store.revision
+            groups = [
+                (kind, name)
+                for kind in GROUP_KINDS
+                for name in store.groups(kind)
+                if (kind, name) not in added_groups
+            ]
+            added_groups.update(groups)
+            if groups:
+                async_add_entities(
+                    FloodGroupSensorEntity(cont, cdnt, kind, name)
+                    for kind, name in groups
+                )
+
+        async_add_group_entities()
+        config_entry.async_on_unload(cdnt.async_add_listener(async_add_group_entities))
 
 
 class FloodSpeedSensorEntity(FloodEntity):
@@ -63,48 +213,347 @@ class FloodSpeedSensorEntity(FloodEntity):
         """Return the icon to use in the frontend."""
         return UnitOfDataRate.KILOBYTES_PER_SECOND
 
+    def _compute_values(self) -> tuple:
+        """Return the speed in kB/s and the transfer totals."""
+        data = self.coordinator.data.get(self._category, {})
+        byte_value = float(data.get(self._key))
+        attributes = None
+        if self._attributes and data:
+            attributes = {
+                attribute: data.get(attribute) for attribute in self._attributes
+            }
+        return int(byte_value / 1024), attributes
+
     @property
     def state(self) -> int:
         """Return the state."""
-        byte_value = float(self.coordinator.data.get(self._category, {}).get(self._key))
-        return int(byte_value / 1024)
+        return self._state_value
 
     @property
     def state_attributes(self):
         """Return the state attributes."""
-        if self._attributes and self.coordinator.data.get(self._category, {}):
-            attributes = {}
-            for attribute in self._attributes:
-                attributes.update(
-                    {
-                        attribute: self.coordinator.data.get(self._category, {}).get(
-                            attribute
-                        )
-                    }
-                )
-            return attributes
+        return self._attributes_value
+
+
+class FloodRateSensorEntity(FloodEntity):
+    """Representation of a rolling statistic of a Flood transfer rate."""
+
+    @property
+    def unit_of_measurement(self) -> str:
+        """Return the unit of speeds."""
+        return UnitOfDataRate.KILOBYTES_PER_SECOND
+
+    def _compute_values(self) -> tuple:
+        """Return the 5 minutes value in kB/s and the value of each window."""
+        values = {
+            f"last_{int(duration / 60)}_min": (
+                int(stats[self._key] / 1024) if stats else None
+            )
+            for duration, stats in self._controller.rates.stats().items()
+        }
+        return values.get("last_5_min"), values
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self._state_value
+
+    @property
+    def state_attributes(self):
+        """Return the state attributes."""
+        return self._attributes_value
 
 
 class FloodSensorEntity(FloodEntity):
     """Representation of a Flood sensor."""
 
+    def _compute_values(self) -> tuple:
+        """Return the value and the attributes from the category data."""
+        data = self.coordinator.data.get(self._category)
+        if not data:
+            return None, None
+        attributes = None
+        if self._attributes:
+            attributes = {
+                attribute: data.get(attribute) for attribute in self._attributes
+            }
+        return data.get(self._key), attributes
+
     @property
     def state(self):
         """Return the state."""
-        if self.coordinator.data.get(self._category):
-            return self.coordinator.data[self._category].get(self._key)
+        return self._state_value
 
     @property
     def state_attributes(self):
         """Return the state attributes."""
-        if self._attributes and self.coordinator.data.get(self._category, {}):
-            attributes = {}
-            for attribute in self._attributes:
-                attributes.update(
-                    {
-                        attribute: self.coordinator.data.get(self._category, {}).get(
-                            attribute
-                        )
-                    }
-                )
-            return attributes
+        return self._attributes_value
+
+
+class FloodTotalSensorEntity(Entity):
+    """Representation of a sensor summing a value over all Flood instances."""
+
+    def __init__(self, hub: FloodHub, name: str, category: str, key: str, icon: str):
+        """Initialize the entity."""
+        self._hub = hub
+        self._name = f"Flood {name}"
+        self._category = category
+        self._key = key
+        self._icon = icon
+        # Total when last written
+        self._total = None
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for updates of any instance."""
+        self._total = self._compute_total()
+        self.async_on_remove(self._hub.async_add_listener(self._handle_hub_update))
+
+    @callback
+    def _handle_hub_update(self) -> None:
+        """Write state only when the total changed."""
+        total = self._compute_total()
+        if total == self._total:
+            return
+        self._total = total
+        self.async_write_ha_state()
+
+    def _compute_total(self):
+        """Return the sum over the instances, in KiB/s for speeds."""
+        total = self._hub.total(self._category, self._key)
+        if total is not None and self._category == "transfer":
+            return int(total / 1024)
+        return total
+
+    @property
+    def should_poll(self) -> bool:
+        """Return False, the hub pushes updates."""
+        return False
+
+    @property
+    def unique_id(self):
+        """Return an unique id."""
+        return f"{DOMAIN}_{self._name}"
+
+    @property
+    def name(self):
+        """Return the name."""
+        return self._name
+
+    @property
+    def icon(self):
+        """Return the icon to use in the frontend."""
+        return self._icon
+
+    @property
+    def unit_of_measurement(self) -> str:
+        """Return the unit of speed totals."""
+        if self._category == "transfer":
+            return UnitOfDataRate.KILOBYTES_PER_SECOND
+        return None
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self._total
+
+
+class FloodTorrentSensorEntity(FloodEntity):
+    """Representation of the progress of a Flood torrent."""
+
+    def __init__(self, controller, coordinator, torrent_hash: str, name: str):
+        """Initialize the entity."""
+        super().__init__(
+            controller, coordinator, f"Torrent {name}", "torrents", icon="mdi:file"
+        )
+        self.torrent_hash = torrent_hash
+        self._revision = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the torrent changed or availability changed."""
+        record = self._controller.torrent_store.get(self.torrent_hash)
+        revision = record.revision if record is not None else None
+        available = self.available
+        if revision == self._revision and available == self._was_available:
+            return
+        self._revision = revision
+        self._was_available = available
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return if the torrent is still in Flood."""
+        return super().available and self.torrent_hash in self._controller.torrent_store
+
+    @property
+    def unique_id(self):
+        """Return an unique id."""
+        return "_".join([DOMAIN, self._controller.host, "torrent", self.torrent_hash])
+
+    @property
+    def unit_of_measurement(self) -> str:
+        """Return the unit of the progress."""
+        return PERCENTAGE
+
+    @property
+    def state(self):
+        """Return the progress."""
+        record = self._controller.torrent_store.get(self.torrent_hash)
+        if record is not None:
+            return round(record.percent_complete, 1)
+
+    @property
+    def state_attributes(self):
+        """Return the state attributes."""
+        record = self._controller.torrent_store.get(self.torrent_hash)
+        if record is None:
+            return None
+        return {
+            "hash": record.hash,
+            "status": list(record.status),
+            "ratio": round(record.ratio, 3),
+            "eta": record.eta,
+            "download_speed": int(record.down_rate / 1024),
+            "upload_speed": int(record.up_rate / 1024),
+            "size": record.size,
+            "tags": list(record.tags),
+        }
+
+
+class FloodGroupSensorEntity(FloodEntity):
+    """Representation of the torrents with a tag or a tracker."""
+
+    def __init__(self, controller, coordinator, kind: str, group: str):
+        """Initialize the entity."""
+        super().__init__(
+            controller,
+            coordinator,
+            f"{kind.capitalize()} {group}",
+            "torrents",
+            icon="mdi:tag" if kind == "tag" else "mdi:server-network",
+        )
+        self._kind = kind
+        self._group = group
+
+    def _is_updated(self) -> bool:
+        """Return True if torrents or transfer rates were refreshed."""
+        return bool({"torrents", "transfer"} & self.coordinator.updated_categories)
+
+    @property
+    def available(self) -> bool:
+        """Return if torrents are still in the group."""
+        return super().available and self._group_counters() is not None
+
+    def _group_counters(self) -> dict:
+        """Return the counters of the group."""
+        return self._controller.torrent_store.group(self._kind, self._group)
+
+    def _compute_values(self) -> tuple:
+        """Return the number of torrents, their statuses and rates in kB/s."""
+        group = self._group_counters()
+        if group is None:
+            return None, None
+        return group["count"], {
+            "downloading": group["downloading"],
+            "seeding": group["seeding"],
+            "download_speed": int(group["downloadSpeed"] / 1024),
+            "upload_speed": int(group["uploadSpeed"] / 1024),
+        }
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self._state_value
+
+    @property
+    def state_attributes(self):
+        """Return the state attributes."""
+        return self._attributes_value
+
+
+class FloodTopSensorEntity(FloodEntity):
+    """Representation of the fastest Flood torrents."""
+
+    def __init__(
+        self, controller, coordinator, name: str, rate: str, count: int, icon: str
+    ):
+        """Initialize the entity listing count torrents by rate."""
+        super().__init__(controller, coordinator, name, "torrents", icon=icon)
+        self._rate = rate
+        self._count = count
+
+    def _is_updated(self) -> bool:
+        """Return True if torrents or transfer rates were refreshed."""
+        return bool({"torrents", "transfer"} & self.coordinator.updated_categories)
+
+    def _compute_values(self) -> tuple:
+        """Return the name of the fastest torrent and the rates in kB/s."""
+        records = self._controller.torrent_store.top(self._count, self._rate)
+        return records[0].name if records else None, {
+            "torrents": [
+                {"name": record.name, "speed": int(getattr(record, self._rate) / 1024)}
+                for record in records
+            ]
+        }
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self._state_value
+
+    @property
+    def state_attributes(self):
+        """Return the state attributes."""
+        return self._attributes_value
+
+
+class FloodDiagnosticSensorEntity(FloodEntity):
+    """Representation of the duration of refreshes, or of requests to an endpoint."""
+
+    @property
+    def entity_category(self):
+        """Return the diagnostic category."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        """Return False, diagnostic sensors are enabled by the user."""
+        return False
+
+    @property
+    def available(self) -> bool:
+        """Return if the last refresh succeeded."""
+        return self.coordinator.last_update_success
+
+    def _is_updated(self) -> bool:
+        """Return True, measures change on every refresh."""
+        return True
+
+    def _compute_values(self) -> tuple:
+        """Return the last duration in milliseconds and the counters."""
+        if self._key is None:
+            duration = self.coordinator.refresh_duration
+            return (
+                round(duration * 1000, 1) if duration is not None else None,
+                {
+                    "skipped_writes": self.coordinator.skipped_writes,
+                    **self._controller.cache_stats,
+                },
+            )
+        metrics = self._controller.metrics.endpoint(self._key).as_dict()
+        return metrics.pop("latency_last_ms"), metrics
+
+    @property
+    def unit_of_measurement(self) -> str:
+        """Return the unit of durations."""
+        return UnitOfTime.MILLISECONDS
+
+    @property
+    def state(self):
+        """Return the state."""
+        return self._state_value
+
+    @property
+    def state_attributes(self):
+        """Return the state attributes."""
+        return self._attributes_value